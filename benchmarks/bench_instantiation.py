@@ -0,0 +1,57 @@
+"""Per-call overhead of calling a python object builder, and its compiled
+`InstantiationPlan`, with trivial constructors.
+
+    python benchmarks/bench_instantiation.py [--number 20000]
+"""
+import argparse
+import timeit
+
+import cfgopt
+
+
+class Norm:
+
+    def __init__(self, channels, momentum=0.1, eps=1e-5) -> None:
+        pass
+
+
+class Conv:
+
+    def __init__(self, in_channels, out_channels, kernel_size=3, stride=1, padding=1, norm=None, act="relu") -> None:
+        pass
+
+
+class Block:
+
+    def __init__(self, in_channels, out_channels, convs, stride=1, dropout=0.) -> None:
+        pass
+
+
+def _builder(module, klass, **kwds):
+    return {"__module__": module, "__class__": klass, **kwds}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    conv = _builder(__name__, "Conv", in_channels=64, out_channels=64, norm=_builder(__name__, "Norm", channels=64))
+    cfg = cfgopt.parse_configs({"layers.json": {
+        "conv": conv,
+        "block": _builder(__name__, "Block", convs=[conv, conv, conv], dropout=0.1),
+    }}, args=[])
+
+    for name, kwds in (("conv", {}), ("block", dict(in_channels=64, out_channels=128))):
+        builder = cfg[f"layers.json/{name}"]
+        plan = builder.compile()
+        results = []
+        for label, fn in (("builder", builder), ("plan", plan)):
+            seconds = min(timeit.repeat(lambda: fn(**kwds), number=args.number, repeat=3))
+            results.append(seconds / args.number * 1e6)
+            print(f"{name:>6} {label:>8}: {results[-1]:8.2f} us/call")
+        print(f"{name:>6} {'speedup':>8}: {results[0] / results[1]:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
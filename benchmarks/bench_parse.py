@@ -0,0 +1,112 @@
+"""Benchmark suite on a synthetic config directory (see `synthetic.py`).
+
+    python benchmarks/bench_parse.py [--files 100 ...] [--repeat 5] [--output results.json]
+
+Times `parse_configs()` (cold, with overlay inheritance, with a warm parse
+cache, and with command line updates), `ConfigContainer.__getitem__` (with and without an index),
+wildcard queries, builder instantiation and `to_json()`, and writes the results as json so that they can be compared
+between releases.
+"""
+import argparse
+import json
+import os.path as osp
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import cfgopt
+
+sys.path.insert(0, osp.dirname(osp.abspath(__file__)))
+import synthetic
+
+
+def measure(fn, repeat, number=1):
+    """Seconds per call of `fn`, over `repeat` rounds of `number` calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return dict(median=statistics.median(times), min=min(times), max=max(times), repeat=repeat, number=number)
+
+
+def run(config: synthetic.SyntheticConfig, repeat=5, lookups=1000):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cfg_root = osp.join(tmp_dir, "cfg")
+        addrs = config.generate(cfg_root)
+        rng = random.Random(config.seed)
+
+        results["parse_configs"] = measure(lambda: cfgopt.parse_configs(cfg_root, args=[]), repeat)
+        results["parse_configs_overlay"] = measure(lambda: cfgopt.parse_configs(cfg_root, args=[], overlay=True), repeat)
+
+        cache_file = osp.join(tmp_dir, "cache.pkl")
+        cfgopt.parse_configs(cfg_root, args=[], cache_file=cache_file)
+        results["parse_configs_cached"] = measure(lambda: cfgopt.parse_configs(cfg_root, args=[], cache_file=cache_file), repeat)
+
+        # updates of existing fields (before expansion) and of inherited fields (after expansion).
+        updates = []
+        for cfg_addr in rng.sample(addrs, min(10, len(addrs))):
+            updates.append(f"--{rng.choice(config.leaf_uris(cfg_addr))[len('cfg://'):]}=0")
+            updates.append(f"--{cfg_addr}/model/extra{config.chain - 1}=0" if config.chain > 1 else f"--{cfg_addr}/values/0=0")
+        results["parse_configs_updates"] = measure(lambda: cfgopt.parse_configs(cfg_root, args=updates), repeat)
+
+        cfg = cfgopt.parse_configs(cfg_root, args=[])
+        uris = [rng.choice(config.leaf_uris(rng.choice(addrs))) for _ in range(lookups)]
+        def getitem():
+            for uri in uris:
+                cfg[uri]
+        results["getitem"] = measure(getitem, repeat)
+        results["getitem"]["lookups"] = lookups
+
+        indexed = cfgopt.parse_configs(cfg_root, args=[])
+        results["build_index"] = measure(indexed.build_index, repeat)
+        def getitem_indexed():
+            for uri in uris:
+                indexed[uri]
+        results["getitem_indexed"] = measure(getitem_indexed, repeat)
+        results["getitem_indexed"]["lookups"] = lookups
+        results["query"] = measure(lambda: indexed.query("group*/*.json/base0/*/*/n0/leaf0"), repeat)
+
+        models = [cfg[f"{cfg_addr}/model"] for cfg_addr in addrs]
+        def call():
+            for model in models:
+                model()
+        results["call"] = measure(call, repeat)
+        results["call"]["builders"] = len(models) * (1 + 2 * config.builders)
+
+        results["to_json"] = measure(lambda: cfg[addrs[-1]].to_json(), repeat)
+
+    return dict(
+        cfgopt=cfgopt.__version__,
+        python=platform.python_version(),
+        platform=platform.platform(),
+        config=config.as_dict(),
+        results=results,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    synthetic.add_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--output", default=None, help="json file to write the results into. (default: stdout)")
+    args = parser.parse_args()
+
+    report = run(synthetic.from_arguments(args), args.repeat, args.lookups)
+    for name, result in report["results"].items():
+        print(f"{name:<24} {result['median'] * 1e3:10.3f} ms", file=sys.stderr)
+    if args.output is None:
+        print(json.dumps(report, indent=4))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Latency and memory of walking a parsed config tree through
+`ConfigContainer`, e.g., reading schedule values at every step, and of
+hashing its content.
+
+    python benchmarks/bench_traverse.py [--nodes 100000] [--repeat 5]
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+import tracemalloc
+
+import cfgopt
+
+
+def tree(nodes, width=8):
+    """A dict tree of about `nodes` dicts, lists and scalars."""
+    data, count, frontier = {}, 1, []
+    frontier.append(data)
+    while count < nodes:
+        parent = frontier.pop(0)
+        for k in range(width):
+            if k % 4 == 3:
+                parent[f"list{k}"] = [k, 0.5, f"s{k}", {"lr": 0.1, "steps": [100, 200]}]
+                count += 6
+            elif k % 4 == 2:
+                parent[f"value{k}"] = k * 0.5
+                count += 1
+            else:
+                child = parent[f"node{k}"] = {"name": f"n{count}"}
+                frontier.append(child)
+                count += 2
+    return data
+
+
+def walk(cfg):
+    n = 0
+    for k, v in cfg.items():
+        n += 1
+        if isinstance(v, cfgopt.ConfigContainer):
+            n += walk(v)
+        elif isinstance(v, list):
+            for i in v:
+                n += 1
+                if isinstance(i, cfgopt.ConfigContainer):
+                    n += walk(i)
+    return n
+
+
+def measure(fn, repeat, setup=lambda: None):
+    """Seconds per call, and the peak and retained memory traced over one more call."""
+    setup()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    seconds = (time.perf_counter() - start) / repeat
+    setup()
+    tracemalloc.start()
+    fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, retained
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    root = cfgopt.parse_configs({"tree.json": tree(args.nodes)}, args=[])["tree.json"]
+    data = root.data
+    size = sys.getsizeof(root)
+    if "__slots__" not in vars(cfgopt.ConfigContainer):
+        size += sys.getsizeof(vars(root))
+    print(f"nodes: {walk(root)}, size of a ConfigContainer: {size} bytes")
+
+    def fresh():
+        nonlocal root
+        root = cfgopt.ConfigContainer(data)
+    for name, repeat, setup in (("first walk", 1, fresh), ("next walks", args.repeat, lambda: None)):
+        seconds, peak, retained = measure(lambda: walk(root), repeat, setup)
+        print(f"{name:<16} {seconds * 1e3:10.3f} ms  {peak / 1e6:8.3f} MB peak  {retained / 1e6:8.3f} MB retained")
+
+    uri, number = "node0/node1/node4/list3/3/steps", 100000
+    def lookups():
+        for _ in range(number):
+            root[uri]
+    seconds, peak, retained = measure(lookups, 1)
+    print(f"{'deep lookup':<16} {seconds / number * 1e9:10.1f} ns  {peak / 1e6:8.3f} MB peak  {retained / 1e6:8.3f} MB retained")
+
+    def full_hash():
+        hashlib.sha256(json.dumps(cfgopt.parser.dewrap(root), sort_keys=True).encode()).hexdigest()
+    def updated_hash():
+        root["node0/node1/node4/list3/3/lr"] = 0.2
+        root.content_hash()
+    for name, fn, repeat in (("json hash", full_hash, args.repeat), ("first hash", root.content_hash, 1),
+                             ("next hashes", root.content_hash, args.repeat), ("updated hash", updated_hash, args.repeat)):
+        seconds, peak, retained = measure(fn, repeat)
+        print(f"{name:<16} {seconds * 1e3:10.3f} ms  {peak / 1e6:8.3f} MB peak  {retained / 1e6:8.3f} MB retained")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Generator of synthetic config directories for benchmarks.
+
+    python benchmarks/synthetic.py OUTPUT_DIR [--files 100 --depth 3 ...]
+
+Every file `groupG/fileI.json` holds:
+
+- `base0` ... `baseN`: a `__base__` chain of `chain` dicts, `base0` being a
+  tree of `depth` levels with `width` keys per level, whose leaves are
+  numbers, strings and relative references to their siblings;
+- `values`: a list of `list_size` numbers;
+- `refs`: `fanout` absolute references into files generated before it;
+- `model`: a python object builder (`argparse.Namespace`) with `builders`
+  nested builders, inheriting the last base.
+"""
+import argparse
+import json
+import os
+import os.path as osp
+import random
+
+BUILDER = {"__module__": "argparse", "__class__": "Namespace"}
+
+
+class SyntheticConfig:
+    """Knobs of a synthetic config directory."""
+
+    def __init__(self, files=100, groups=10, depth=3, width=4, chain=3, fanout=4,
+                 relative_refs=4, list_size=64, builders=8, seed=0) -> None:
+        self.files = files
+        self.groups = groups
+        self.depth = depth
+        self.width = width
+        self.chain = chain
+        self.fanout = fanout
+        self.relative_refs = relative_refs
+        self.list_size = list_size
+        self.builders = builders
+        self.seed = seed
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def addresses(self):
+        return [f"group{i % self.groups}/file{i}.json" for i in range(self.files)]
+
+    def leaf_uris(self, cfg_addr):
+        """Uris of the leaves of `base0` in the file `cfg_addr`."""
+        uris = [f"cfg://{cfg_addr}/base0"]
+        for _ in range(self.depth):
+            uris = [f"{uri}/n{k}" for uri in uris for k in range(self.width)]
+        return [f"{uri}/leaf{k}" for uri in uris for k in range(self.width)]
+
+    def generate_file(self, index, rng):
+        addrs = self.addresses()
+        cfg_addr = addrs[index]
+
+        def tree(level):
+            if level == self.depth:
+                node = {f"leaf{k}": rng.choice([rng.random(), rng.randint(0, 1000), f"s{rng.randint(0, 1000)}"])
+                        for k in range(self.width)}
+                for k in range(min(self.relative_refs, self.width - 1)):
+                    node[f"rel{k}"] = f"cfg://leaf{k + 1}"
+                return node
+            return {f"n{k}": tree(level + 1) for k in range(self.width)}
+
+        data = {"base0": tree(0)}
+        for k in range(1, self.chain):
+            data[f"base{k}"] = {"__base__": f"cfg://{cfg_addr}/base{k - 1}", f"extra{k}": k}
+        data["values"] = [rng.random() for _ in range(self.list_size)]
+        data["refs"] = {}
+        for k in range(self.fanout if index else 0):
+            other = addrs[rng.randrange(index)]
+            data["refs"][f"r{k}"] = rng.choice(self.leaf_uris(other))
+        data["model"] = {
+            **BUILDER,
+            "__base__": f"cfg://{cfg_addr}/base{self.chain - 1}",
+            "layers": [{**BUILDER, "channels": 2 ** (k % 10), "norm": {**BUILDER, "momentum": 0.1}}
+                       for k in range(self.builders)],
+        }
+        return cfg_addr, data
+
+    def generate(self, cfg_root):
+        """Write the config directory into `cfg_root`, returns the file addresses."""
+        rng = random.Random(self.seed)
+        addrs = []
+        for index in range(self.files):
+            cfg_addr, data = self.generate_file(index, rng)
+            path = osp.join(cfg_root, cfg_addr)
+            os.makedirs(osp.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(data, f, indent=4)
+            addrs.append(cfg_addr)
+        return addrs
+
+
+def add_arguments(parser):
+    defaults = SyntheticConfig()
+    for name, value in defaults.as_dict().items():
+        parser.add_argument(f"--{name.replace('_', '-')}", type=type(value), default=value)
+
+
+def from_arguments(args):
+    return SyntheticConfig(**{name: getattr(args, name) for name in SyntheticConfig().as_dict()})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("cfg_root")
+    add_arguments(parser)
+    args = parser.parse_args()
+    addrs = from_arguments(args).generate(args.cfg_root)
+    print(f"{len(addrs)} files written to {args.cfg_root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
 from .parser import parse_configs, ConfigContainer, undefined, PartialClass
+from .parser import callable_cache, release_shared
+from .profile import ParseProfile
+from .snapshot import ConfigSnapshot
+from .index import ConfigIndex
+from .sidecar import BinaryArray
+from .session import ConfigSession
 from .main import main
 from .parser import HOSTNAME
-from .utils import root
\ No newline at end of file
+from .utils import root, __version__
\ No newline at end of file
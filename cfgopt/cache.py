@@ -0,0 +1,99 @@
+import os
+import os.path as osp
+import pickle
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import __version__
+
+_CACHE_FORMAT = 1
+
+
+def _stat_file(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def stat_files(paths, max_workers=None):
+    """Map each path to its `(mtime_ns, size)`, `None` if it does not exist.
+    Paths are stat'ed by a pool of `max_workers` threads."""
+    paths = list(paths)
+    if max_workers == 1 or len(paths) < 2:
+        return {path: _stat_file(path) for path in paths}
+    with ThreadPoolExecutor(max_workers) as pool:
+        return dict(zip(paths, pool.map(_stat_file, paths)))
+
+
+def cache_key(*extra):
+    """Everything that may change parsing results besides file contents."""
+    return (__version__, _CACHE_FORMAT, sys.version_info[:2]) + extra
+
+
+class ParseCache:
+    """A resolved config tree stored on disk, together with the raw tree it
+    was resolved from and the stats of every file it depends on.
+
+    The trees are kept as pickled bytes so that only the one actually needed
+    by the current launch is deserialized."""
+
+    def __init__(self, key, files, modules, raw, resolved=None) -> None:
+        self.key = key
+        self.files = files
+        """`(mtime_ns, size)` of config files, keyed by path."""
+        self.modules = modules
+        """`(mtime_ns, size)` of python source files imported while parsing."""
+        self.raw_bytes = raw
+        self.resolved_bytes = resolved
+
+    def raw(self):
+        return pickle.loads(self.raw_bytes)
+
+    def resolved(self):
+        if self.resolved_bytes is None:
+            return None
+        return pickle.loads(self.resolved_bytes)
+
+    def is_valid(self, key, cfg_files, max_workers=None):
+        if self.key != key:
+            return False
+        if set(self.files) != set(cfg_files):
+            return False
+        if stat_files(self.files, max_workers) != self.files:
+            return False
+        return stat_files(self.modules, max_workers) == self.modules
+
+    @classmethod
+    def load(cls, cache_file):
+        try:
+            with open(cache_file, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return None
+        if not isinstance(state, dict) or state.get("format") != _CACHE_FORMAT:
+            return None
+        return cls(state["key"], state["files"], state["modules"], state["raw"], state["resolved"])
+
+    def dump(self, cache_file):
+        state = dict(
+            format=_CACHE_FORMAT,
+            key=self.key,
+            files=self.files,
+            modules=self.modules,
+            raw=self.raw_bytes,
+            resolved=self.resolved_bytes,
+        )
+        cache_dir = osp.dirname(osp.abspath(cache_file))
+        os.makedirs(cache_dir, exist_ok=True)
+        # write then rename, so that concurrent launches never read a partial file.
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except OSError:
+            if osp.exists(tmp_file):
+                os.remove(tmp_file)
+            raise
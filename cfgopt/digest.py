@@ -0,0 +1,87 @@
+import hashlib
+import json
+import weakref
+
+
+def _default(data):
+    # a dict never appears in the encoding of a node otherwise.
+    from .sidecar import BinaryArray
+    if isinstance(data, BinaryArray):
+        return {"binary": data.uri}
+    cls = type(data)
+    return {"object": f"{cls.__module__}.{cls.__qualname__}:{data!r}"}
+
+
+_ENCODE = json.JSONEncoder(sort_keys=True, default=_default).encode
+
+_TABLES = weakref.WeakSet()
+"""the live `ContentHashes`, which a value set in any container invalidates."""
+
+
+def invalidate_digests(data):
+    """Forget the digests of `data` and of the nodes containing it in every
+    live table, as a container does not know the tables of the containers
+    above it."""
+    for hashes in list(_TABLES):
+        hashes.invalidate(data)
+
+
+class ContentHashes:
+    """Merkle digests of the dicts and lists of a config tree, cached by node.
+
+    A node is hashed as the json of its keys and values, in which the dicts
+    and lists are replaced by their digests, so that equal trees have equal
+    digests whatever their order of keys or sharing of nodes. Set values
+    through `ConfigContainer.__setitem__` so that only the digests of the
+    nodes containing the modified one are computed again, in every table. Modifying the raw
+    data in place bypasses it, call `clear()` after that."""
+
+    def __init__(self) -> None:
+        self.nodes = {}
+        """hex digest of the hashed dicts and lists by id, kept with the node so that ids stay unique."""
+        self.parents = {}
+        """ids of the hashed dicts and lists containing a node, by its id."""
+        _TABLES.add(self)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def clear(self):
+        self.nodes.clear()
+        self.parents.clear()
+
+    def hexdigest(self, data):
+        if not isinstance(data, (dict, list)):
+            return hashlib.sha256(b"v" + _ENCODE(data).encode()).hexdigest()
+        entry = self.nodes.get(id(data))
+        if entry is not None and entry[0] is data:
+            return entry[1]
+        parents, node = self.parents, id(data)
+        if isinstance(data, dict):
+            # dicts and lists are replaced by lists holding their digests.
+            payload = {}
+            for k, v in data.items():
+                if isinstance(v, (dict, list)):
+                    parents.setdefault(id(v), set()).add(node)
+                    v = [self.hexdigest(v)]
+                payload[k] = v
+            encoded = b"d" + _ENCODE(payload).encode()
+        else:
+            payload = []
+            for v in data:
+                if isinstance(v, (dict, list)):
+                    parents.setdefault(id(v), set()).add(node)
+                    v = [self.hexdigest(v)]
+                payload.append(v)
+            encoded = b"l" + _ENCODE(payload).encode()
+        digest = hashlib.sha256(encoded).hexdigest()
+        self.nodes[node] = (data, digest)
+        return digest
+
+    def invalidate(self, data):
+        """Forget the digests of `data` and of the hashed nodes containing it."""
+        stack = [id(data)]
+        while len(stack):
+            node = stack.pop()
+            if self.nodes.pop(node, None) is not None:
+                stack.extend(self.parents.pop(node, ()))
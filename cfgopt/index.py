@@ -0,0 +1,167 @@
+from fnmatch import fnmatchcase
+
+_MISSING = object()
+_MAGIC = "*?["
+
+
+def _join(uri, key):
+    return f"{uri}/{key}" if uri else str(key)
+
+
+def _is_pattern(segment):
+    return any(c in segment for c in _MAGIC)
+
+
+class ConfigIndex:
+    """A flat index of a config tree, mapping canonical uris (e.g.,
+    "models/resnet.json/backbone/depth", without `cfg://`) to their values.
+
+    Built by `ConfigContainer.build_index()`, after which the container
+    looks uris up in it, and keeps it up to date when values are set through
+    `__setitem__`, including command-line updates. Modifying the raw data
+    in place bypasses the index, call `build_index()` again after that."""
+
+    def __init__(self, root) -> None:
+        self.root = root
+        """the indexed `ConfigContainer`."""
+        self.nodes = {}
+        """raw value by uri."""
+        self.children = {}
+        """names of the children of dicts, lists and directories by uri."""
+        self.sites = {}
+        """uris of dicts and lists, by their ids, as they may be referenced from several places."""
+        self.wrapped = {}
+        """wrapped dicts and lists by uri, the same objects `root` returns."""
+        self._add("", root.data)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, uri) -> bool:
+        return uri in self.nodes
+
+    def _add(self, uri, data):
+        nodes, children, sites = self.nodes, self.children, self.sites
+        stack = [(uri, data)]
+        while len(stack):
+            uri, data = stack.pop()
+            if uri:
+                nodes[uri] = data
+            if isinstance(data, dict):
+                items = data.items()
+            elif isinstance(data, list):
+                items = enumerate(data)
+            else:
+                continue
+            sites.setdefault(id(data), set()).add(uri)
+            names = children[uri] = []
+            prefix = f"{uri}/" if uri else ""
+            for k, v in items:
+                name = k if type(k) is str else str(k)
+                if not uri and "/" in name:
+                    # file addresses under directories.
+                    self._add_dirs(name)
+                else:
+                    names.append(name)
+                if isinstance(v, (dict, list)):
+                    stack.append((prefix + name, v))
+                else:
+                    nodes[prefix + name] = v
+
+    def _add_dirs(self, cfg_addr):
+        parent = ""
+        for name in cfg_addr.split("/"):
+            names = self.children.setdefault(parent, [])
+            if name not in names:
+                names.append(name)
+            parent = _join(parent, name)
+
+    def _remove(self, uri):
+        for name in self.children.pop(uri, ()):
+            self._remove(_join(uri, name))
+        data = self.nodes.pop(uri, None)
+        self.wrapped.pop(uri, None)
+        sites = self.sites.get(id(data))
+        if sites is not None:
+            sites.discard(uri)
+            if not len(sites):
+                del self.sites[id(data)]
+
+    def update(self, parent, key):
+        """Index again the child at `key` of the raw dict or list `parent`,
+        wherever `parent` is indexed."""
+        value = parent[int(key) if isinstance(parent, list) else key]
+        for uri in list(self.sites.get(id(parent), ())):
+            child = _join(uri, key)
+            self._remove(child)
+            if uri or "/" not in str(key):
+                if str(key) not in self.children[uri]:
+                    self.children[uri].append(str(key))
+            else:
+                self._add_dirs(key)
+            self._add(child, value)
+
+    def get(self, uri, default=None):
+        """The value at the canonical `uri`, wrapped as `root[uri]` does."""
+        data = self.nodes.get(uri, _MISSING)
+        if data is _MISSING:
+            return default
+        return self.wrap(uri, data)
+
+    def wrap(self, uri, data):
+        if not isinstance(data, (dict, list)):
+            return data
+        from .parser import ConfigContainer, _wrapped_list_unchanged
+        wrapped = self.wrapped.get(uri)
+        if wrapped is not None:
+            if type(wrapped) is ConfigContainer:
+                if wrapped.data is data:
+                    return wrapped
+            elif type(data) is list and _wrapped_list_unchanged(data, wrapped):
+                return wrapped
+        wrapped = self.wrapped[uri] = self.root._lookup(self.root._split_uri(uri))
+        return wrapped
+
+    def uris(self, prefix="", recursive=False):
+        """Uris of the children of `prefix` (a canonical uri of a dict, a list
+        or a directory of json files), or of all its descendants if `recursive`."""
+        prefix = prefix.strip("/")
+        if prefix not in self.children:
+            if prefix in self.nodes:
+                return []
+            raise KeyError(prefix)
+        uris = []
+        for name in self.children[prefix]:
+            uri = _join(prefix, name)
+            uris.append(uri)
+            if recursive and uri in self.children:
+                uris.extend(self.uris(uri, recursive=True))
+        return uris
+
+    def query(self, pattern):
+        """Values of the uris matching `pattern` by uri, where a `*`, `?` or
+        `[seq]` in a segment is matched against one key as by `fnmatch`, and
+        a `**` segment matches any number of keys."""
+        segments = [s for s in pattern.split("/") if s]
+        found = {}
+        self._match("", segments, found)
+        return {uri: self.wrap(uri, data) for uri, data in found.items()}
+
+    def _match(self, uri, segments, found):
+        if uri not in self.nodes and uri not in self.children:
+            return
+        elif not len(segments):
+            if uri in self.nodes:
+                found.setdefault(uri, self.nodes[uri])
+            return
+        segment, rest = segments[0], segments[1:]
+        if segment == "**":
+            self._match(uri, rest, found)
+            for name in self.children.get(uri, ()):
+                self._match(_join(uri, name), segments, found)
+        elif _is_pattern(segment):
+            for name in self.children.get(uri, ()):
+                if fnmatchcase(name, segment):
+                    self._match(_join(uri, name), rest, found)
+        else:
+            self._match(_join(uri, segment), rest, found)
@@ -1,4 +1,5 @@
 import argparse
+import sys
 
 import cfgopt
 
@@ -14,15 +15,94 @@ def main():
         default="cfg",
         help="config directory that maps to cfg:// root. (default: `cfg`)"
     )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="file to cache the parsed config directory in, reused by later runs until any config changes. (default: no cache)"
+    )
+    parser.add_argument(
+        "--lazy",
+        action="store_true",
+        help="only load and parse the config files reachable from `recipe`."
+    )
+    parser.add_argument(
+        "--defer-imports",
+        action="store_true",
+        help="import the modules of python object builders when they are first used, instead of by parsing."
+    )
+    parser.add_argument(
+        "--overlay",
+        action="store_true",
+        help="share the values of `__base__` dicts with the dicts inheriting them, copied when updated, instead of deep copies."
+    )
+    parser.add_argument(
+        "--server",
+        action="store_true",
+        help="ask a running `cfgopt-server` for the parsed recipe, and parse locally if none is running."
+    )
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="socket of the `cfgopt-server` to ask with `--server`. (default: derived from the absolute path of `cfgdir`)"
+    )
+    parser.add_argument(
+        "--sweep",
+        default=None,
+        help="run the recipe for every point of a sweep, json or a file, e.g., '{\"lr\": [0.1, 0.01]}' for a grid (see `cfgopt.sweep.load_sweep`)."
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        type=int,
+        default=None,
+        help="number of sweep runs at a time. (default: the number of cpus)"
+    )
+    parser.add_argument(
+        "--log-dir",
+        default="sweep",
+        help="directory of the logs and summary of the sweep runs. (default: `sweep`)"
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print the time and counters of each parsing phase to stderr."
+    )
     args, unknown_args = parser.parse_known_args()
+    if args.sweep is not None:
+        return _sweep(parser, args, unknown_args)
+    profile = cfgopt.ParseProfile() if args.profile else None
     cfgs = cfgopt.parse_configs(
         cfg_root=args.cfgdir,
         args=unknown_args,
         args_root=args.recipe,
+        cache_file=args.cache,
+        lazy=args.lazy,
+        profile=profile,
+        defer_imports=args.defer_imports,
+        server=(args.socket or True) if args.server else None,
+        overlay=args.overlay,
     )
+    if profile is not None:
+        print(profile.report(), file=sys.stderr)
     _main = cfgs[args.recipe]
     return _main(recursive=False)
 
 
+def _sweep(parser, args, unknown_args):
+    from .sweep import load_sweep, run_sweep
+    for option in ("cache", "lazy", "defer_imports", "server", "overlay", "profile"):
+        if getattr(args, option):
+            parser.error(f"--{option.replace('_', '-')} is not supported with --sweep.")
+    try:
+        arg_lists = load_sweep(args.sweep)
+    except ValueError as e:
+        parser.error(str(e))
+    # parsed and imported once, each run applies its args to a variant of the tree.
+    session = cfgopt.ConfigSession(args.cfgdir, args=unknown_args, args_root=args.recipe)
+    runs = run_sweep(session, args.recipe, arg_lists, args.jobs, args.log_dir)
+    failed = [i for i, run in enumerate(runs) if run["exitcode"] != 0]
+    print(f"cfgoptrun: {len(runs) - len(failed)} of {len(runs)} runs succeeded, see {args.log_dir}", file=sys.stderr)
+    return 1 if len(failed) else 0
+
+
 if __name__ == "__main__":
     main()
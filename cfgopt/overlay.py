@@ -0,0 +1,189 @@
+def _items(node):
+    return enumerate(node) if isinstance(node, list) else node.items()
+
+
+def _key(parent, key):
+    return int(key) if isinstance(parent, list) else key
+
+
+class Overlay:
+    """Dicts and lists shared by `__base__` inheritance in overlay mode,
+    copied when written so that every dict sees what deep copies would.
+
+    A dict inheriting a base borrows the values of the base, and sees them
+    in its own view: setting a value on a path through a borrowed edge
+    copies the shared nodes on the way into the view, once, and all the
+    edges of the view to them are moved to the copies, as a deep copy would
+    have kept references between them. A dict inheriting a dict which
+    itself borrows values sees them in the chain of both views, as the
+    copy of a copy. Setting a value in a shared node through its own edges
+    (from the base, or from a `cfg://` reference to it) modifies it in
+    place, after the views seeing it are given copies, so that they do not
+    see it."""
+
+    def __init__(self) -> None:
+        self.nodes = {}
+        """shared dicts and lists by id, kept so that ids stay unique."""
+        self.parents = {}
+        """`(id(parent), key)` to the shared parents of a shared node, by its id."""
+        self.borrowed = {}
+        """`(id(holder), key)` to the holder and view of the borrowed edges to a shared node, by its id."""
+        self.owners = {}
+        """the inheriting dicts by id, a view being a tuple of their ids."""
+        self.views = {}
+        """the copies of shared nodes in a view, as `id(node)` to `(node, copy)`, by view."""
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, node) -> bool:
+        return id(node) in self.nodes
+
+    def __getstate__(self):
+        # ids are not kept by pickling, the nodes are.
+        nodes, owners = self.nodes, self.owners
+        parents = [(nodes[n], parent, key) for n, edges in self.parents.items() for (_, key), parent in edges.items()]
+        borrowed = [(nodes[n], holder, key, [owners[o] for o in view])
+                    for n, edges in self.borrowed.items() for (_, key), (holder, view) in edges.items()]
+        views = [([owners[o] for o in view], list(copies.values())) for view, copies in self.views.items()]
+        return list(nodes.values()), list(owners.values()), parents, borrowed, views
+
+    def __setstate__(self, state):
+        nodes, owners, parents, borrowed, views = state
+        self.nodes = {id(node): node for node in nodes}
+        self.owners = {id(owner): owner for owner in owners}
+        self.parents = {}
+        self.borrowed = {}
+        self.views = {tuple(map(id, view)): {id(node): (node, copy) for node, copy in copies} for view, copies in views}
+        for node, parent, key in parents:
+            self.parents.setdefault(id(node), {})[(id(parent), key)] = parent
+        for node, holder, key, view in borrowed:
+            self._borrow(holder, key, node, tuple(map(id, view)))
+
+    def share(self, holder, key, base):
+        """Let the inheriting dict `holder` borrow the value at `key`, taken
+        from its dict `base`. Returns the number of newly shared nodes."""
+        value = holder[key]
+        if not isinstance(value, (dict, list)):
+            return 0
+        self.owners[id(holder)] = holder
+        self._borrow(holder, key, value, (id(holder),) + self._view(base, key, value))
+        return self._mark(value)
+
+    def enter(self, parent, key, node, view=None):
+        """Follow the edge at `key` of `parent` to `node`, on the path of a
+        value to be set, in `view` if the path went through a borrowed edge.
+
+        Returns the node to follow instead (its copy in the view), the view,
+        and the `(holder, key)` of the edges replaced by copies."""
+        edge = self._view(parent, key, node)
+        if len(edge):
+            view = edge
+        elif view is None or id(node) not in self.nodes:
+            return node, view, []  # a node of the tree, or of the view itself.
+        changed = self._detach(node, lambda v: v == view, view)
+        entry = self.views.get(view, {}).get(id(node))
+        return (node if entry is None else entry[1]), view, changed
+
+    def write(self, parent, key, value):
+        """`parent[key] = value`, giving the views seeing `parent` copies of
+        it first if it is shared. Returns the `(holder, key)` of the edges
+        replaced by copies."""
+        key = _key(parent, key)
+        if id(parent) not in self.nodes:
+            parent[key] = value
+            return []
+        changed = self._detach(parent, lambda v: True)
+        parent[key] = value
+        self._adopt(parent, key)
+        return changed
+
+    def _view(self, holder, key, node):
+        """The view of the edge at `key` of `holder` if it borrows `node`, else `()`."""
+        edges = self.borrowed.get(id(node))
+        edge = edges.get((id(holder), _key(holder, key))) if edges else None
+        return () if edge is None else edge[1]
+
+    def _detach(self, node, selected, view=None):
+        """Give the selected views seeing the shared `node` copies of the
+        shared nodes on their way to it, so that it can be modified in
+        place. Shared holders of their edges, modified in place as well, are
+        first detached from the other views than `view`."""
+        # the ancestors, with the views of the paths from them to `node`.
+        ancestors, paths, stack = {}, set(), [(node, ())]
+        while len(stack):
+            n, suffix = stack.pop()
+            if (id(n), suffix) in paths:
+                continue
+            paths.add((id(n), suffix))
+            ancestors[id(n)] = n
+            for (_, key), parent in self.parents.get(id(n), {}).items():
+                stack.append((parent, self._view(parent, key, n) + suffix))
+        edges = {}
+        for n_id, suffix in paths:
+            n = ancestors[n_id]
+            borrowed = self.borrowed.get(n_id)
+            for (_, key), (holder, v) in list(borrowed.items()) if borrowed else ():
+                if holder[key] is not n:
+                    del borrowed[(id(holder), key)]  # replaced since.
+                elif selected(v + suffix):
+                    edges[(id(holder), key)] = holder, key, n, v
+        edges = list(edges.values())
+        changed = []
+        if view is not None:
+            for holder in {id(holder): holder for holder, _, _, _ in edges if id(holder) in self.nodes}.values():
+                changed += self._detach(holder, lambda v: v != view)
+        # all copies are made before any holder is modified, as holders may be ancestors as well.
+        copies = [self._copy(n, ancestors, v) for _, _, n, v in edges]
+        for (holder, key, n, _), copied in zip(edges, copies):
+            holder[key] = copied
+            self.borrowed[id(n)].pop((id(holder), key), None)
+            changed.append((holder, key))
+        return changed
+
+    def _copy(self, node, ancestors, view):
+        """The copy of `node` in `view`, with the copies of its children in
+        `ancestors`, and borrowed edges to its other shared children."""
+        copies = self.views.setdefault(view, {})
+        entry = copies.get(id(node))
+        if entry is not None:
+            return entry[1]
+        copied = type(node)(node)
+        copies[id(node)] = (node, copied)
+        for k, v in _items(node):
+            if not isinstance(v, (dict, list)):
+                continue
+            # a child borrowed by `node` is seen as the copy of its copy.
+            child_view = view + self._view(node, k, v)
+            entry = self.views.get(child_view, {}).get(id(v))
+            if entry is not None:
+                copied[k] = entry[1]
+            elif id(v) in ancestors:
+                copied[k] = self._copy(v, ancestors, child_view)
+            elif id(v) in self.nodes:
+                self._borrow(copied, k, v, child_view)
+        return copied
+
+    def _borrow(self, holder, key, node, view):
+        self.borrowed.setdefault(id(node), {})[(id(holder), key)] = (holder, view)
+
+    def _adopt(self, parent, key):
+        """Share the value set in place at `key` of the shared `parent`."""
+        value = parent[key]
+        if isinstance(value, (dict, list)):
+            self.parents.setdefault(id(value), {})[(id(parent), key)] = parent
+            self._mark(value)
+
+    def _mark(self, value):
+        n = len(self.nodes)
+        stack = [value]
+        while len(stack):
+            node = stack.pop()
+            if id(node) in self.nodes:
+                continue
+            self.nodes[id(node)] = node
+            for k, v in _items(node):
+                if isinstance(v, (dict, list)):
+                    self.parents.setdefault(id(v), {})[(id(node), k)] = node
+                    stack.append(v)
+        return len(self.nodes) - n
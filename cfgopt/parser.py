@@ -1,18 +1,30 @@
+import atexit
 import glob
 import importlib
 import json
 import os
 import os.path as osp
+import pickle
 import re
 import types
-import jsbeautifier
 import sys
+import time
+import warnings
 from copy import deepcopy
+from io import StringIO
 from inspect import Parameter, signature, isclass, isfunction
 from typing import Any, Dict, Union
 from socket import gethostname
 from collections import abc
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
 
+from .cache import ParseCache, cache_key, stat_files
+from .digest import ContentHashes, invalidate_digests
+from .index import _MISSING, ConfigIndex
+from .overlay import Overlay
+from .profile import ParseProfile, null_phase
+from .sidecar import BinaryArray, is_sidecar
+from .snapshot import ConfigSnapshot
 from .utils import PARSE_ROOT
 
 HOSTNAME = gethostname()
@@ -26,6 +38,7 @@ _PRT = ".."  # parent
 _PTC = "cfg://"  # protocal
 _PTL = len(_PTC)  # protocal length
 _SEP = "/"  # seperator
+_SHR = "__shared__"
 
 undefined = f"{_PTC}__undefined__"
 
@@ -49,14 +62,238 @@ def _get_parameters(klass):
         raise ConfigParseError(f"Unknown Python Callable {klass.__name__}")
     return parameters
 
-def wrap(data):
+class _ParameterTable:
+    """Parameters of a python callable, with the lookups done by instantiation precomputed."""
+
+    def __init__(self, klass) -> None:
+        self.klass = klass
+        try:
+            self.items = _get_parameters(klass)
+            self.error = None
+        except ValueError as e:
+            self.items = []
+            self.error = e
+            """`ValueError` raised by `inspect.signature`, e.g., for some builtins."""
+        self.names = {k for k, _ in self.items}
+        self.var_keyword = None
+        self.positional_only = False
+        for k, p in self.items:
+            if p.kind == Parameter.VAR_KEYWORD:
+                self.var_keyword = k
+            elif p.kind == Parameter.POSITIONAL_ONLY:
+                self.positional_only = True
+        self.undefined_defaults = [k for k, p in self.items
+            if p.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY) and p.default is Parameter.empty]
+        """required parameters, which are filled with `undefined` by parsing."""
+
+    def raise_error(self):
+        raise ValueError(*self.error.args)
+
+class CallableCache:
+    """Process-wide cache of python callables addressed by `__module__` and
+    `__class__`, and of their parameter tables.
+
+    Call `invalidate()` after reloading modules, and `stats()` to see the
+    hit rates."""
+
+    def __init__(self) -> None:
+        self._callables = {}
+        self._parameters = {}
+        self._signatures = {}
+        """names of required parameters, and source files they depend on, by `(module_name, class_name)`."""
+        self._unresolved = {}
+        """import errors of `required_parameters()`, not imported again until `invalidate()`."""
+        self._version = 0
+        """number of changes of the signature table, to only persist it when changed."""
+        self._dumped = {}
+        """version of the signature table last loaded from or persisted in each file."""
+        self._dumped_at_exit = set()
+        """files the signature table is persisted in again when the process exits."""
+        self.callable_hits = 0
+        self.callable_misses = 0
+        self.parameter_hits = 0
+        self.parameter_misses = 0
+
+    def resolve(self, module_name, class_name):
+        """Import `module_name` and get `class_name` from it, raises
+        `ModuleNotFoundError` or `AttributeError` as usual."""
+        key = (module_name, class_name)
+        klass = self._callables.get(key)
+        if klass is not None:
+            self.callable_hits += 1
+            return klass
+        self.callable_misses += 1
+        module = importlib.import_module(module_name)
+        klass = self._callables[key] = getattr(module, class_name)
+        return klass
+
+    def parameters(self, klass) -> _ParameterTable:
+        try:
+            table = self._parameters.get(klass)
+        except TypeError:  # unhashable callable object
+            return _ParameterTable(klass)
+        if table is not None:
+            self.parameter_hits += 1
+            return table
+        self.parameter_misses += 1
+        table = self._parameters[klass] = _ParameterTable(klass)
+        return table
+
+    def required_parameters(self, module_name, class_name, klass=None):
+        """Names of the parameters without default of a callable, looked up
+        in the signature table before importing `module_name` (unless the
+        callable `klass` is given)."""
+        key = (module_name, class_name)
+        signature = self._signatures.get(key)
+        if signature is not None:
+            return signature[0]
+        if klass is None:
+            error = self._unresolved.get(key)
+            if error is not None:
+                raise error
+            try:
+                klass = self.resolve(module_name, class_name)
+            except Exception as e:
+                self._unresolved[key] = e.with_traceback(None)
+                raise
+        params = self.parameters(klass)
+        if params.error is not None and "no signature found" not in params.error.args[0]:
+            params.raise_error()
+        modules = [sys.modules.get(module_name), sys.modules.get(getattr(klass, "__module__", None))]
+        files = sorted({m.__file__ for m in modules if getattr(m, "__file__", None)})
+        self._signatures[key] = (tuple(params.undefined_defaults), files)
+        self._version += 1
+        return self._signatures[key][0]
+
+    def load_signatures(self, signature_file):
+        """Load the entries of the signature table persisted in
+        `signature_file` whose source files did not change."""
+        try:
+            with open(signature_file) as f:
+                table = json.load(f)
+        except (OSError, ValueError):
+            return
+        persisted = set()
+        for entry in table if isinstance(table, list) else []:
+            try:
+                key = (entry["module"], entry["class"])
+                files = {path: tuple(stat) for path, stat in entry["files"].items()}
+                params = tuple(entry["params"])
+            except (KeyError, TypeError, AttributeError):
+                continue
+            if len(files) and stat_files(files) == files:
+                persisted.add(key)
+                if key not in self._signatures:
+                    self._signatures[key] = (params, sorted(files))
+        if persisted.issuperset(self._signatures):
+            self._dumped[signature_file] = self._version
+
+    def dump_signatures(self, signature_file, at_exit=False):
+        """Persist the signature table in `signature_file`, if it changed
+        since it was last loaded from or persisted there. If `at_exit`, also
+        when the process exits, with the signatures looked up after."""
+        if at_exit and signature_file not in self._dumped_at_exit:
+            self._dumped_at_exit.add(signature_file)
+            atexit.register(self.dump_signatures, signature_file)
+        if self._dumped.get(signature_file) == self._version:
+            return
+        table = []
+        for (module_name, class_name), (params, files) in self._signatures.items():
+            stats = stat_files(files, max_workers=1)
+            if None not in stats.values():
+                table.append({"module": module_name, "class": class_name, "params": list(params), "files": stats})
+        tmp_file = f"{signature_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump(table, f)
+            os.replace(tmp_file, signature_file)
+        except OSError as e:
+            # the table is only an optimization.
+            warnings.warn(f"Unable to write the signature table {signature_file}: {e}", RuntimeWarning)
+            return
+        self._dumped[signature_file] = self._version
+
+    def invalidate(self, module_name=None):
+        """Forget callables of `module_name` (or all when it is None), e.g., after `importlib.reload`."""
+        if module_name is None:
+            self._callables.clear()
+            self._parameters.clear()
+            self._signatures.clear()
+            self._unresolved.clear()
+            self._version += 1
+            return
+        for key in [key for key in self._callables if key[0] == module_name]:
+            del self._callables[key]
+        for key in [key for key in self._signatures if key[0] == module_name]:
+            del self._signatures[key]
+            self._version += 1
+        for key in [key for key in self._unresolved if key[0] == module_name]:
+            del self._unresolved[key]
+        for klass in [klass for klass in self._parameters if getattr(klass, "__module__", None) == module_name]:
+            del self._parameters[klass]
+
+    def stats(self):
+        def rate(hits, misses):
+            return hits / (hits + misses) if hits + misses else 0.
+        return dict(
+            callables=len(self._callables),
+            callable_hits=self.callable_hits,
+            callable_misses=self.callable_misses,
+            callable_hit_rate=rate(self.callable_hits, self.callable_misses),
+            parameter_tables=len(self._parameters),
+            parameter_hits=self.parameter_hits,
+            parameter_misses=self.parameter_misses,
+            parameter_hit_rate=rate(self.parameter_hits, self.parameter_misses),
+        )
+
+callable_cache = CallableCache()
+
+def _fill_undefined(data):
+    """Fill omitted required parameters of the builders in `data` (a dict or a
+    list of them) with `undefined`, when their callables can be found.
+    Otherwise the error is raised by calling them."""
+    if isinstance(data, list):
+        for v in data:
+            _fill_undefined(v)
+        return
+    if not (isinstance(data, dict) and _MOD in data and _CLS in data):
+        return
+    try:
+        names = callable_cache.required_parameters(data[_MOD], data[_CLS])
+    except Exception:
+        return
+    for k in names:
+        if k not in data:
+            data[k] = undefined
+
+def wrap(data, uri=None):
     if isinstance(data, dict):
-        return ConfigContainer(data)
+        wrapped = ConfigContainer(data)
+        wrapped._uri = uri
+        return wrapped
     elif isinstance(data, list):
-        return [wrap(i) for i in data]
+        return [wrap(d, None if uri is None else f"{uri}/{i}") for i, d in enumerate(data)]
     else:
         return data
 
+def _add_origin(error, uri, path=""):
+    """Attach the `cfg://` origin of the builder at `path` of the called
+    builder at `uri` (None if unknown) to the raised `error`, as a note, or
+    in its message before python 3.11."""
+    if uri is None:
+        origin = f"'{path}' of the called builder"
+    else:
+        origin = f"'{_PTC}{'/'.join(u for u in (uri, path) if u)}'"
+    note = f"Config origin: {origin}"
+    if note in getattr(error, "__notes__", ()) or any(isinstance(a, str) and a.endswith(note) for a in error.args):
+        return  # raised again, e.g., a cached import error.
+    if hasattr(error, "add_note"):  # python>=3.11
+        error.add_note(note)
+    elif len(error.args) == 1 and isinstance(error.args[0], str):
+        error.args = (f"{error.args[0]}\n{note}",)
+    elif not len(error.args):
+        error.args = (note,)
+
 def dewrap(data):
     if isinstance(data, ConfigContainer):
         return data.data
@@ -66,35 +303,358 @@ def dewrap(data):
         return [dewrap(v) for v in data]
     else:
         return data
-    
-class ConfigContainerIter:
-    
-    def __init__(self, cfg) -> None:
-        self.keys = list(cfg.keys())
-        self.i = 0
-        self.n = len(self.keys)
-        
-    def __next__(self):
-        if self.i >= self.n:
-            raise StopIteration
-        i = self.i
-        self.i += 1
-        return self.keys[i]
-        
-    
+
+_INDENT = "    "
+
+_JSON_WORDS = {None: "null", True: "true", False: "false"}
+
+def _json_scalar(data):
+    cls = type(data)
+    if cls is str:
+        return json.encoder.encode_basestring_ascii(data)
+    elif cls is int:
+        return int.__repr__(data)
+    elif cls is bool or data is None:
+        return _JSON_WORDS[data]
+    elif cls is BinaryArray:
+        return json.encoder.encode_basestring_ascii(data.uri)
+    return json.dumps(data)
+
+def _write_json(data, write, level=0):
+    """Write `data` to `write` piece by piece, with the indentation of `jsbeautifier.beautify(json.dumps(data))`."""
+    if isinstance(data, ConfigContainer):
+        data = data.data
+    if isinstance(data, dict):
+        if not len(data):
+            write("{}")
+            return
+        sep = "{\n"
+        for k, v in data.items():
+            write(f"{sep}{_INDENT * (level + 1)}{_json_scalar(str(k))}: ")
+            _write_json(v, write, level + 1)
+            sep = ",\n"
+        write(f"\n{_INDENT * level}}}")
+    elif isinstance(data, (list, tuple)):
+        if not len(data):
+            write("[]")
+            return
+        # a list starting with a list, or with a list after a list or a dict,
+        # puts that list on a new line and indents all its items one level more.
+        data = [v.data if isinstance(v, ConfigContainer) else v for v in data]
+        is_list = [isinstance(v, (list, tuple)) for v in data]
+        nested = [is_list[i] or isinstance(v, dict) for i, v in enumerate(data)]
+        breaks = [is_list[i] and (i == 0 or nested[i - 1]) for i in range(len(data))]
+        inner = level + 1 if any(breaks) else level
+        broken = False
+        write("[")
+        for i, v in enumerate(data):
+            token = None if nested[i] else _json_scalar(v)
+            if not breaks[i] and broken and token is not None and not is_list[i - 1] and nested[i - 1]:
+                # words (not strings or negative numbers) after a dict, once the list has been broken.
+                breaks[i] = token[0] not in '"-'
+            if breaks[i]:
+                broken = True
+                write(f"{',' if i else ''}\n{_INDENT * inner}")
+            elif i:
+                write(", ")
+            if token is None:
+                _write_json(v, write, inner)
+            else:
+                write(token)
+        if inner != level:
+            write(f"\n{_INDENT * level}")
+        write("]")
+    else:
+        write(_json_scalar(data))
+
+def _apply_arguments(data, _args, _kwds):
+    """Apply `_args` and `_kwds` to the builder `data`, returns its callable and a new dict."""
+    try:
+        klass = callable_cache.resolve(data[_MOD], data[_CLS])
+    except ModuleNotFoundError as e:
+        raise ConfigParseError(f"Trying to import '{data[_MOD]}', but n{str(e.args[0])[1:]}. Check your PYTHONPATH.") from None
+    params = callable_cache.parameters(klass)
+    data = dict(data)
+    # update args
+    if params.error is not None:
+        if "no signature found" in params.error.args[0]:
+            if len(_args):
+                raise ConfigParseError(f"Please use keyword to pass in arguments for `{data[_CLS]}`.") from params.error
+        params.raise_error()
+    for (k, p), arg in zip(params.items, _args):
+        if p.kind == Parameter.POSITIONAL_OR_KEYWORD:
+            data[k] = arg
+        else:
+            raise ConfigParseError(f'Can\'t parse argument \'{k}\' for {data[_CLS]}.')
+    # update kwds
+    if params.var_keyword is not None and params.var_keyword in data:
+        var_keyword_subdict = data.pop(params.var_keyword)
+        data.update(var_keyword_subdict)
+    data.update(_kwds)
+
+    # check wether klass accept variable keyword
+    if params.var_keyword is None:
+        for k in data:
+            if k.startswith("__"):
+                continue
+            if k not in params.names:
+                raise ConfigParseError(f"Unsupported parameter '{k}' for class '{klass.__name__}'.")
+
+    if params.positional_only:
+        raise ConfigParseError(f"Unsupported parameter type '{Parameter.POSITIONAL_ONLY}' for class '{klass.__name__}'.")
+    # required parameters of builders whose parsing is deferred.
+    for k in params.undefined_defaults:
+        if k not in data:
+            data[k] = undefined
+    return klass, data
+
+def _instantiate(klass, data):
+    # if there is any required param yet undefined, do not instantiate
+    for v in data.values():
+        if isinstance(v, str) and v == undefined: return data
+    else: # else instantiate
+        return klass(**{k:wrap(v) for k, v in data.items() if not k.startswith("__")})
+
+_SHARED_SCOPES = {}
+"""instances memoized in named scopes, by scope name."""
+
+def release_shared(scope=None):
+    """Forget the instances memoized in the named `scope`, or in every scope if None."""
+    if scope is None:
+        _SHARED_SCOPES.clear()
+    else:
+        _SHARED_SCOPES.pop(scope, None)
+
+class _SharedInstances:
+    """Instances of the shared builders of one top-level call, memoized by
+    the id of the builder dict they are built from. Instances in named
+    scopes outlive the call, and are only returned again while the content
+    hash of the builder is the one they were built from."""
+
+    __slots__ = ("scope", "local", "stored")
+
+    def __init__(self, scope=None) -> None:
+        self.scope = scope
+        """`shared` flag of the call: None, True to share every nested builder, or the name of a scope."""
+        self.local = {}
+        self.stored = []
+        """`(memo, key)` of the instances stored by the call."""
+
+    def memo(self, data):
+        """The memo of the builder `data`, None if it is not shared."""
+        scope = data.get(_SHR, self.scope)
+        if not scope:
+            return None
+        if scope is True:
+            scope = self.scope
+        return _SHARED_SCOPES.setdefault(scope, {}) if isinstance(scope, str) else self.local
+
+    def version(self, memo, data, digest=None):
+        """The content hash of the builder `data` (or `digest`) in a named scope, None in the call's own memo."""
+        if memo is self.local:
+            return None
+        return digest if digest is not None else ContentHashes().hexdigest(data)
+
+    def get(self, memo, data, version=None, default=None):
+        entry = memo.get(id(data))
+        return entry[1] if entry is not None and entry[0] is data and entry[2] == version else default
+
+    def store(self, memo, data, instance, version=None):
+        # the builder is kept, so that its id stays unique.
+        memo[id(data)] = (data, instance, version)
+        self.stored.append((memo, id(data)))
+
+def _recursive_instantiate(data, instantiate, path="", root=False, shared=None):
+    """Replace nested builders in `data` by `instantiate(klass, applied_data, path)`,
+    innermost first. Containers are only copied when some of their children change.
+    Shared builders are instantiated once, memoized in `shared`."""
+    if isinstance(data, dict):
+        source, memo = data, None
+        if shared is not None and not root and _CLS in data and not data.get(_AST, False):
+            memo = shared.memo(data)
+            if memo is not None:
+                version = shared.version(memo, data)
+                instance = shared.get(memo, data, version, _MISSING)
+                if instance is not _MISSING:
+                    return instance
+        copied = None
+        for k, v in data.items():
+            if k.startswith("__"): continue
+            new_v = _recursive_instantiate(v, instantiate, f"{path}/{k}" if path else k, shared=shared)
+            if new_v is not v:
+                if copied is None:
+                    copied = dict(data)
+                copied[k] = new_v
+        if copied is not None:
+            data = copied
+        if not root and _CLS in data and not data.get(_AST, False):
+            data = instantiate(*_apply_arguments(data, (), {}), path)
+            if memo is not None:
+                shared.store(memo, source, data, version)
+    elif isinstance(data, list):
+        new_data = [_recursive_instantiate(d, instantiate, f"{path}/{i}" if path else str(i), shared=shared) for i, d in enumerate(data)]
+        if any(new_d is not d for new_d, d in zip(new_data, data)):
+            data = new_data
+    return data
+
+class _BuildTask:
+    """A nested builder to be instantiated by `_instantiate_concurrently()`."""
+
+    def __init__(self, klass, data, path, index) -> None:
+        self.klass = klass
+        self.data = data
+        self.path = path
+        self.index = index
+        """position in the order of sequential instantiation."""
+        self.deps = _collect_tasks(data, [])
+        self.result = _MISSING
+
+def _collect_tasks(data, tasks):
+    if isinstance(data, _BuildTask):
+        tasks.append(data)
+    elif isinstance(data, dict):
+        for v in data.values():
+            _collect_tasks(v, tasks)
+    elif isinstance(data, list):
+        for v in data:
+            _collect_tasks(v, tasks)
+    return tasks
+
+def _fill_tasks(data):
+    """Replace the tasks in `data` by their results, copying the containers on write."""
+    if isinstance(data, _BuildTask):
+        return data.result
+    elif isinstance(data, dict):
+        filled = {k: _fill_tasks(v) for k, v in data.items()}
+        if any(filled[k] is not v for k, v in data.items()):
+            return filled
+    elif isinstance(data, list):
+        filled = [_fill_tasks(v) for v in data]
+        if any(f is not v for f, v in zip(filled, data)):
+            return filled
+    return data
+
+def _construct(klass, kwds):
+    return klass(**kwds)
+
+def _instantiate_concurrently(data, executor, shared=None, uri=None):
+    """`_recursive_instantiate()` with the nested builders instantiated on
+    `executor`. When some builders fail, the error of the first one in
+    sequential order is raised, as sequential instantiation would, with the
+    origin of the builder, at `uri` if known."""
+    tasks = []
+    def schedule(klass, data, path):
+        for v in data.values():
+            if isinstance(v, str) and v == undefined: return data
+        tasks.append(_BuildTask(klass, data, path, len(tasks)))
+        return tasks[-1]
+    data = _recursive_instantiate(data, schedule, root=True, shared=shared)
+
+    waiting = {task: len(task.deps) for task in tasks}
+    dependents = {task: [] for task in tasks}
+    for task in tasks:
+        for dep in task.deps:
+            dependents[dep].append(task)
+    ready = [task for task in tasks if not len(task.deps)]
+    running, failed, error = {}, None, None
+    while len(ready) or len(running):
+        for task in ready:
+            # builders after a failed one are not instantiated, as sequentially.
+            if failed is None or task.index < failed.index:
+                kwds = {k: wrap(_fill_tasks(v)) for k, v in task.data.items() if not k.startswith("__")}
+                running[executor.submit(_construct, task.klass, kwds)] = task
+        ready = []
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            task = running.pop(future)
+            try:
+                task.result = future.result()
+            except Exception as e:
+                if failed is None or task.index < failed.index:
+                    failed, error = task, e
+                continue
+            for dependent in dependents[task]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    ready.append(dependent)
+        ready.sort(key=lambda task: task.index)
+    if shared is not None:
+        # memoized tasks are replaced by their results, or forgotten if not built.
+        for memo, key in shared.stored:
+            source, task, version = memo[key]
+            if isinstance(task, _BuildTask):
+                if task.result is _MISSING:
+                    del memo[key]
+                else:
+                    memo[key] = (source, task.result, version)
+    if failed is not None:
+        _add_origin(error, uri, failed.path)
+        raise error
+    return _fill_tasks(data)
+
+def _wrapped_list_unchanged(data, wrapped):
+    """Whether the list `wrapped` still wraps the items of the list `data`."""
+    if len(data) != len(wrapped):
+        return False
+    for v, w in zip(data, wrapped):
+        if v is w:
+            continue
+        elif type(w) is ConfigContainer:
+            if w.data is not v:
+                return False
+        elif not (type(w) is list and type(v) is list and _wrapped_list_unchanged(v, w)):
+            return False
+    return True
+
+
+def _share_state(wrapped, source, recursive=False):
+    """Let the containers in `wrapped` update the index and share the content
+    hashes of the container `source`, and copy its overlay nodes, when values are set
+    through them, and fill their builders if `source` defers imports. If
+    `recursive`, also the cached children of the containers."""
+    if type(wrapped) is list:
+        for w in wrapped:
+            _share_state(w, source, recursive)
+    elif type(wrapped) is ConfigContainer:
+        wrapped._index = source._index
+        wrapped._overlay = source._overlay
+        wrapped._hashes = source._hashes
+        wrapped._deferred = source._deferred
+        if recursive and wrapped._children:
+            for cached in wrapped._children.values():
+                _share_state(cached, source, recursive)
+
+
 class ConfigContainer(abc.Mapping):
     """This class stores a internal dict, and support 
-    cfg:// format `__getitem__` and `__setitem__` method."""
+    cfg:// format `__getitem__` and `__setitem__` method.
+
+    Wrapped dicts and lists are cached, so that addressing the same child
+    again returns the same object, as long as it is not replaced."""
+
+    __slots__ = ("data", "_children", "_index", "_overlay", "_hashes", "_deferred", "_uri")
 
     def __init__(self, data: Dict) -> None:
         self.data = data
         """stores the raw dict data."""
+        self._children = None
+        """wrapped dict and list children by key."""
+        self._index = None
+        """`ConfigIndex` of the tree this container is addressed from, if built."""
+        self._overlay = None
+        """`Overlay` of the nodes shared by `__base__` inheritance of the tree, in overlay mode."""
+        self._hashes = None
+        """`ContentHashes` of the tree this container is addressed from, once hashed."""
+        self._deferred = False
+        """whether the tree is parsed with `defer_imports`, filling builders when addressed."""
+        self._uri = ""
+        """uri of the container as addressed from its root, reported as the origin of failed builders. None if unknown."""
     
     def __len__(self) -> int:
         return len(self.data)
     
     def __iter__(self):
-        return ConfigContainerIter(self)
+        return iter(self.keys())
         
     def keys(self):
         if isinstance(self.data, dict):
@@ -105,20 +665,74 @@ class ConfigContainer(abc.Mapping):
             raise NotImplementedError
     
     def items(self):
-        if not isinstance(self.data, abc.Mapping):
+        data = self.data
+        if type(data) is not dict and not isinstance(data, abc.Mapping):
             raise TypeError()
-        for k, v in self.data.items():
-            yield k, wrap(v)
+        wrap_child = self._wrap_child
+        for k, v in data.items():
+            yield k, wrap_child(k, v) if isinstance(v, (dict, list)) else v
     
     def values(self):
-        if not isinstance(self.data, abc.Mapping):
-            raise TypeError()
-        for v in self.data.values():
-            yield wrap(v)
+        for _, v in self.items():
+            yield v
+
+    def _wrap_child(self, key, data):
+        """`wrap(data)` of the dict or list `data` at `key`, cached."""
+        children = self._children
+        if children is None:
+            children = self._children = {}
+        else:
+            cached = children.get(key)
+            if type(cached) is ConfigContainer:
+                if cached.data is data:
+                    return cached
+            elif cached is not None and type(data) is list:
+                # the returned list may have been modified in place, as well as the raw one.
+                if _wrapped_list_unchanged(data, cached):
+                    return cached
+        if self._deferred:
+            _fill_undefined(data)
+        wrapped = wrap(data, None if self._uri is None else f"{self._uri}/{key}" if self._uri else str(key))
+        if self._index is not None or self._overlay is not None or self._hashes is not None or self._deferred:
+            _share_state(wrapped, self)
+        children[key] = wrapped
+        return wrapped
+
+    def _child(self, key):
+        data = self.data
+        if type(data) is dict and key != "":
+            try:
+                item = data[key]
+            except KeyError:
+                # required parameters of builders whose parsing is deferred.
+                if not (self._deferred and _MOD in data and _CLS in data):
+                    raise
+                _fill_undefined(data)
+                item = data[key]
+        else:
+            item = self._get_item_from_list_or_dict(data, key)
+            if isinstance(data, list):
+                key = int(key)
+        if not isinstance(item, (dict, list)):
+            return item
+        children = self._children
+        if children is not None:
+            wrapped = children.get(key)
+            if type(wrapped) is ConfigContainer and wrapped.data is item:
+                return wrapped
+        return self._wrap_child(key, item)
         
     def to_json(self, file=None):
-        
-        json_str = jsbeautifier.beautify(json.dumps(dewrap(self.data)))
+        """Pretty-printed json of the config, returned as a string and also
+        written to the path `file` if given. If `file` is a writable text
+        stream, the json is written to it piece by piece instead, and None
+        is returned."""
+        if hasattr(file, "write"):
+            _write_json(self.data, file.write)
+            return None
+        buffer = StringIO()
+        _write_json(self.data, buffer.write)
+        json_str = buffer.getvalue()
         if file is not None:
             with open(file, 'w') as writer:
                 writer.write(json_str)
@@ -130,12 +744,28 @@ class ConfigContainer(abc.Mapping):
         return self.data == other
     
     def __getitem__(self, uri:str):
+        index = self._own_index()
+        if index is not None and isinstance(uri, str):
+            canonical = _remove_protocol_prefix(uri)
+            item = index.nodes.get(canonical, _MISSING)
+            if item is not _MISSING:
+                return index.wrap(canonical, item)
         keys = self._split_uri(uri)
-        item = self.data
         try:
-            for key in keys:
-                item = self._get_item_from_list_or_dict(item, key)
+            return self._lookup(keys)
+        except ConfigParseError:
+            raise
         except:
+            item = self
+            for key in keys:
+                try:
+                    item = item._child(key) if type(item) is ConfigContainer else self._get_item_from_list_or_dict(item, key)
+                except ConfigParseError:
+                    raise
+                except:
+                    break
+            if isinstance(item, ConfigContainer):
+                item = item.data
             msg = f"While addressing '{uri}', key '{key}' does not exist"
             if isinstance(item, (dict, list)):
                 msg += f", available keys are {[k for k in item]}"
@@ -149,16 +779,53 @@ class ConfigContainer(abc.Mapping):
                                   tb_lineno=back_frame.f_lineno)
             raise URINotFoundError(msg).with_traceback(back_tb) from None
 
-        return wrap(item)
+    def _lookup(self, keys):
+        item = self
+        for key in keys:
+            if type(item) is ConfigContainer:
+                item = item._child(key)
+            else:
+                item = self._get_item_from_list_or_dict(item, key)
+        return item
     
     def __setitem__(self, uri:str, data:Any):
         keys = self._split_uri(uri)
         item = self.data
+        overlay = self._overlay
+        if overlay is not None and item in overlay:
+            raise ConfigParseError(f"Unable to set '{uri}', since the container is inherited from a base in overlay mode. Set it from a container above.")
+        container, view = self, None
         for key in keys[:-1]:
+            parent = item
             item = self._get_item_from_list_or_dict(item, key)
+            if overlay is not None:
+                # nodes borrowed from a base are copied on the written path only.
+                item, view, changed = overlay.enter(parent, key, item, view)
+                self._replaced(changed)
+            if container is not None:
+                container = (container._children or {}).get(int(key) if isinstance(container.data, list) else key)
+                if not (isinstance(container, ConfigContainer) and container.data is item):
+                    container = None
         key = keys[-1]
-        self._set_item_from_list_or_dict(item, key, data)
+        if overlay is not None and item in overlay:
+            # the dicts inheriting the node are given copies first.
+            self._replaced(overlay.write(item, key, data))
+        else:
+            self._set_item_from_list_or_dict(item, key, data)
+        # other cached children are checked against the raw data when addressed.
+        if container is not None and container._children:
+            container._children.pop(int(key) if isinstance(item, list) else key, None)
+        if self._index is not None:
+            self._index.update(item, key)
+        invalidate_digests(item)
     
+    def _replaced(self, edges):
+        """Update the index and content hashes for the `(parent, key)` children replaced by the overlay."""
+        for parent, key in edges:
+            if self._index is not None:
+                self._index.update(parent, key)
+            invalidate_digests(parent)
+
     def __repr__(self) -> str:
         return f"{self.__class__.__qualname__}({repr(self.data)})"
     
@@ -188,7 +855,8 @@ class ConfigContainer(abc.Mapping):
         else:
             raise TypeError(f"Expect a list or dict, got {type(item)}.")
     
-    def _split_uri(self, uri):
+    @staticmethod
+    def _split_uri(uri):
         # integer is for indexing lists
         if isinstance(uri, int):
             return [uri]
@@ -226,79 +894,259 @@ class ConfigContainer(abc.Mapping):
 
     def __setstate__(self, data):
         self.data = data
+        self._children = None
+        self._index = None
+        self._overlay = None
+        self._hashes = None
+        self._deferred = False
+        self._uri = None
     
     def __getattr__(self, attrname):
         return getattr(self.data, attrname)
     
-    def __call__(self, *args: Any, recursive=True, **kwds: Any) -> Any:
-        
-        def instantiate(data, *_args, **_kwds):
-            if _MOD in data and _CLS in data:
-                module = importlib.import_module(data[_MOD])
-                klass = getattr(module, data[_CLS])
-                # update args
-                try:
-                    for (k, p), arg in zip(_get_parameters(klass), _args):
-                        if p.kind == Parameter.POSITIONAL_OR_KEYWORD:
-                            data[k] = arg
-                        else:
-                            raise ConfigParseError(f'Can\'t parse argument \'{k}\' for {data[_CLS]}.')
-                except ValueError as e:
-                    if "no signature found" in e.args[0]:
-                        if len(_args):
-                            raise ConfigParseError(f"Please use keyword to pass in arguments for `{data[_CLS]}`.") from e
-                # update kwds
-                for k, p in _get_parameters(klass):
-                    if p.kind == Parameter.VAR_KEYWORD and p.name in data:
-                        var_keyword_subdict = data.pop(p.name)
-                        data.update(var_keyword_subdict)
-                data.update(deepcopy(_kwds))
-                
-                # check wether klass accept variable keyword
-                if Parameter.VAR_KEYWORD not in [p.kind for _, p in _get_parameters(klass)]:
-                    accept_args = [k for k, p in _get_parameters(klass)]
-                    for k in data:
-                        if k.startswith("__"):
-                            continue
-                        if k not in accept_args:
-                            raise ConfigParseError(f"Unsupported parameter '{k}' for class '{klass.__name__}'.")
-                        
-                for k, p in _get_parameters(klass):
-                    if p.kind == Parameter.POSITIONAL_ONLY:
-                        raise ConfigParseError(f"Unsupported parameter type '{p.kind}' for class '{klass.__name__}'.")
-                
-                # if there is any required param yet undefined, do not instantiate
-                for v in data.values():
-                    if v == undefined: return data
-                else: # else instantiate
-                    return klass(**{k:wrap(v) for k, v in data.items() if not k.startswith("__")})
-            else: # fallback to direct call
-                return data(*_args, **_kwds)
-            
+    def __call__(self, *args: Any, recursive=True, executor:Union[Executor, int, None]=None,
+                 shared:Union[bool, str, None]=None, **kwds: Any) -> Any:
+        """Instantiate the python object builder, or return a new builder
+        with `args` and `kwds` applied if some required parameters are still
+        undefined.
+
+        The builder data is never modified: applied arguments and nested
+        objects are merged into new dicts along the changed paths, and all
+        other values are shared with the builder, so they should not be
+        modified in place.
+
+        If `executor` (a `concurrent.futures.Executor`, or the number of
+        threads of a new thread pool) is given, nested builders are
+        instantiated on it, each as soon as the builders nested in it are
+        instantiated. Results and raised errors are the same as without it.
+
+        Nested builders with a `"__shared__": true` field, or all of them if
+        `shared` is True, are instantiated once by the call, and the same
+        instance is passed everywhere the builder is referenced. With a
+        scope name instead of true (`"__shared__": "data"` or `shared="data"`),
+        instances are also reused by later calls, until `release_shared()`."""
+
+        data = self.data
+        applied = None
+        if _MOD in data and _CLS in data:
+            applied = _apply_arguments(data, args, kwds)
+            if any(isinstance(v, str) and v == undefined for v in applied[1].values()):
+                # a partially applied builder can be called again, nested builders are kept as is.
+                partial = ConfigContainer(applied[1])
+                partial._uri = self._uri
+                return partial
+
         if recursive:
-            def recursive_instantiate(data, root):
-                if isinstance(data, dict):
-                    for k in data:
-                        if k.startswith("__"): continue
-                        data[k] = recursive_instantiate(data[k], False)
-                    if not root and _CLS in data and not data.get(_AST, False):
-                        data = instantiate(data)
-                elif isinstance(data, list):
-                    data = [recursive_instantiate(d, False) for d in data]
-                return data
-            data = recursive_instantiate(deepcopy(self.data), root=True)
-        else:
-            data = deepcopy(self.data)
+            shared = _SharedInstances(shared)
+            if executor is None:
+                def instantiate(klass, data, path):
+                    try:
+                        return _instantiate(klass, data)
+                    except Exception as e:
+                        _add_origin(e, self._uri, path)
+                        raise
+                instantiated = _recursive_instantiate(data, instantiate, root=True, shared=shared)
+            elif isinstance(executor, int):
+                with ThreadPoolExecutor(executor) as pool:
+                    instantiated = _instantiate_concurrently(data, pool, shared, self._uri)
+            else:
+                instantiated = _instantiate_concurrently(data, executor, shared, self._uri)
+            if instantiated is not data:
+                data, applied = instantiated, None
 
-        return instantiate(data, *args, **kwds)
+        if _MOD in data and _CLS in data:
+            try:
+                return _instantiate(*(applied or _apply_arguments(data, args, kwds)))
+            except Exception as e:
+                _add_origin(e, self._uri)
+                raise
+        else: # fallback to direct call
+            return data(*args, **kwds)
     
     def __contains__(self, uri):
+        index = self._own_index()
+        if index is not None and isinstance(uri, str) and _remove_protocol_prefix(uri) in index.nodes:
+            return True
         try:
-            self[uri]
+            self._lookup(self._split_uri(uri))
             return True
-        except:
+        except Exception:
             return False
 
+    def _own_index(self):
+        index = self._index
+        return index if index is not None and index.root is self else None
+
+    def build_index(self) -> ConfigIndex:
+        """Build a `ConfigIndex` of the tree, which `__getitem__` looks exact
+        uris up in, and `__setitem__` keeps up to date."""
+        self._index = ConfigIndex(self)
+        # containers already addressed from this one, e.g., by command-line updates, update it as well.
+        _share_state(self, self, recursive=True)
+        return self._index
+
+    def uris(self, prefix="", recursive=False):
+        """Canonical uris of the children of `prefix` (a dict, a list or a
+        directory of json files), or of all its descendants if `recursive`."""
+        index = self._own_index()
+        if index is None:
+            index = ConfigIndex(self)
+        return index.uris(_remove_protocol_prefix(prefix), recursive)
+
+    def query(self, pattern):
+        """A dict of the values whose uris match `pattern` by canonical uri,
+        e.g., `cfg.query("models/*.json/*/backbone/depth")`. A `*`, `?` or
+        `[seq]` in a segment matches one key as by `fnmatch`, and a `**`
+        segment matches any number of keys. `cfg[uri]` never matches
+        wildcards, so that keys containing them can be addressed."""
+        index = self._own_index()
+        if index is None:
+            index = ConfigIndex(self)
+        return index.query(_remove_protocol_prefix(pattern))
+
+    def content_hash(self, uri=None, refresh=False) -> str:
+        """A stable sha256 hex digest of the content of the subtree at `uri`
+        (or of the whole container), equal for equal subtrees. Digests of the
+        nodes are cached, and only computed again on the path of the values
+        set through `__setitem__`, e.g., by command-line updates, or all of
+        them if `refresh` (after modifying the raw data in place)."""
+        if refresh and self._hashes is not None:
+            self._hashes.clear()
+        if self._hashes is None:
+            self._hashes = ContentHashes()
+            # containers already addressed from this one hash into it as well.
+            _share_state(self, self, recursive=True)
+        data = self.data if uri is None else self[uri]
+        if isinstance(data, ConfigContainer):
+            data = data.data
+        elif isinstance(data, list):
+            data = self.data
+            for key in self._split_uri(uri):
+                data = self._get_item_from_list_or_dict(data, key)
+        return self._hashes.hexdigest(data)
+
+    def freeze(self, path=None) -> ConfigSnapshot:
+        """Copy the tree into a read-only `ConfigSnapshot` file at `path` (a
+        new file in shared memory if None), which other processes attach to
+        without copying it."""
+        return ConfigSnapshot.create(self.data, path)
+
+    def compile(self) -> "InstantiationPlan":
+        """Compile the python object builder into an `InstantiationPlan`, for
+        builders called many times."""
+        return InstantiationPlan(self)
+
+
+def _compile_shared(source, make):
+    """`make`, returning the instance memoized in `shared` if the builder `source` is shared."""
+    digest = []  # of `source` as compiled, hashed once if shared in a named scope.
+    def make_shared(shared):
+        memo = shared.memo(source)
+        if memo is None:
+            return make(shared)
+        if memo is not shared.local and not digest:
+            digest.append(shared.version(memo, source))
+        version = shared.version(memo, source, digest[0] if digest else None)
+        instance = shared.get(memo, source, version, _MISSING)
+        if instance is _MISSING:
+            instance = make(shared)
+            shared.store(memo, source, instance, version)
+        return instance
+    return make_shared
+
+def _compile_value(data):
+    """A function of the `_SharedInstances` of a call, making the value
+    `data` is instantiated to by a recursive call, None if nothing in `data`
+    is instantiated."""
+    if isinstance(data, dict):
+        if _CLS in data and not data.get(_AST, False):
+            source = data
+            klass, data = _apply_arguments(data, (), {})
+            if any(isinstance(v, str) and v == undefined for v in data.values()):
+                makers = _compile_items(data, wrapped=False)
+                if not len(makers):
+                    return None
+                return lambda shared: {**data, **{k: make(shared) for k, make in makers}}
+            makers = _compile_items(data, wrapped=True)
+            return _compile_shared(source, lambda shared: klass(**{k: make(shared) for k, make in makers}))
+        makers = _compile_items(data, wrapped=False)
+        if not len(makers):
+            return None
+        return lambda shared: {**data, **{k: make(shared) for k, make in makers}}
+    elif isinstance(data, list):
+        makers = [_compile_value(d) for d in data]
+        if all(make is None for make in makers):
+            return None
+        return lambda shared: [d if make is None else make(shared) for d, make in zip(data, makers)]
+    return None
+
+def _compile_items(data, wrapped):
+    """`(key, make)` pairs of the parameters in `data`. If `wrapped`, all of
+    them are made as they are passed to python callables, otherwise only the
+    instantiated ones."""
+    makers = []
+    for k, v in data.items():
+        if k.startswith("__"):
+            continue
+        make = _compile_value(v)
+        if wrapped:
+            if make is not None:
+                make = (lambda make: lambda shared: wrap(make(shared)))(make)
+            elif isinstance(v, list):
+                make = (lambda v: lambda shared: wrap(v))(v)
+            else:
+                make = (lambda v: lambda shared: v)(wrap(v))
+        if make is not None:
+            makers.append((k, make))
+    return makers
+
+
+class InstantiationPlan:
+    """A python object builder compiled by `ConfigContainer.compile()`.
+
+    Nested builders are looked up, applied and validated once by compiling,
+    so that calling the plan only merges the arguments and calls the python
+    callables. Nested builders overridden by arguments are not instantiated,
+    and calls leaving some required parameters undefined are passed to the
+    builder. The builder should not be modified after compiling."""
+
+    def __init__(self, builder:ConfigContainer) -> None:
+        data = builder.data
+        if not isinstance(data, dict) or _MOD not in data or _CLS not in data:
+            raise TypeError(f"Only python object builders can be compiled, got {builder!r}.")
+        self.builder = builder
+        self.klass, data = _apply_arguments(data, (), {})
+        self.params = callable_cache.parameters(self.klass)
+        self.required = {k for k, v in data.items() if v == undefined}
+        self.positional = []
+        """leading positional-or-keyword parameters, which positional arguments are passed to."""
+        for k, p in self.params.items:
+            if p.kind != Parameter.POSITIONAL_OR_KEYWORD:
+                break
+            self.positional.append(k)
+        self.makers = _compile_items(data, wrapped=True)
+
+    def __call__(self, *args: Any, shared:Union[bool, str, None]=None, **kwds: Any) -> Any:
+        params = self.params
+        call_kwds = dict(kwds, shared=shared) if shared is not None else kwds
+        if len(args):
+            if params.error is not None or min(len(args), len(params.items)) > len(self.positional):
+                return self.builder(*args, **call_kwds)  # raises the usual error
+            kwds = {**dict(zip(self.positional, args)), **kwds}
+        if params.var_keyword is None and any(k not in params.names and not k.startswith("__") for k in kwds):
+            return self.builder(*args, **call_kwds)  # raises the usual error
+        if not self.required.issubset(kwds) or any(isinstance(v, str) and v == undefined for v in kwds.values()):
+            return self.builder(*args, **call_kwds)  # partial application
+        shared = _SharedInstances(shared)
+        kwargs = {k: make(shared) for k, make in self.makers if k not in kwds}
+        for k, v in kwds.items():
+            if not k.startswith("__"):
+                kwargs[k] = wrap(v)
+        return self.klass(**kwargs)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self.builder!r})"
+
 
 def PartialClass(klass, *args, **kwds):
 
@@ -308,178 +1156,347 @@ def PartialClass(klass, *args, **kwds):
     }
 
     # set defaults
-    for k, param in signature(klass).parameters.items():
+    parameters = signature(klass).parameters
+    for k, param in parameters.items():
         if param.default is Parameter.empty:
             cfg_dict[k] = undefined
         else:
             cfg_dict[k] = param.default
 
-    # update args
-    for k, arg in zip(signature(klass).parameters.keys(), args):
-        cfg_dict[k] = deepcopy(arg)
+    # update args, which are shared with the caller like `functools.partial`
+    for k, arg in zip(parameters.keys(), args):
+        cfg_dict[k] = arg
 
     # update kwds
-    cfg_dict.update(deepcopy(kwds))
+    cfg_dict.update(kwds)
 
     return ConfigContainer(cfg_dict)
 
 
-def parse_configs(cfg_root:Union[str, Dict], args=None, args_root=None) -> ConfigContainer:
-    """This function load all json config files in `cfg_root`,
-    updates it with command line options, follows and substitute
-    the `cfg://` block references."""
-
-    if isinstance(cfg_root, str):
-
-        if PARSE_ROOT[0] is not None:
-            cfg_root = osp.join(PARSE_ROOT[0], cfg_root)
-        if not osp.isdir(cfg_root):
-            raise TypeError(f"`cfg_root` (\"{cfg_root}\") is not a directory.")
-        # load raw data from json files
-        root = {}
-        cfg_file_glob_pattern = osp.join(cfg_root, "**", "*.json")
-        for cfg_file in glob.glob(cfg_file_glob_pattern, recursive=True):
-            cfg_addr = osp.relpath(cfg_file, cfg_root)
-            if os.stat(cfg_file).st_size == 0: # empty (but existing) file
-                cfg_data = {}
-            else:
-                with open(cfg_file) as _f:
-                    try:
-                        cfg_data = json.load(_f)
-                    except json.JSONDecodeError as e:
-                        raise ConfigParseError(f"While parsing {cfg_file}, {e}.") from None
-            root[cfg_addr] = cfg_data
-    elif isinstance(cfg_root, dict):
-        root = cfg_root
-    else:
-        raise TypeError(f"Type of `cfg_root` not supported, expect directory string or a dict, got `{type(cfg_root)}`.")
+class ReferenceCycleError(ConfigParseError): ...
 
-    router = ConfigContainer(root)
 
-    # use command line options to update json configs
-    def command_line_update(_args):
-        updator_pattern = re.compile("^--(.*?)=(.*)")
-        unparsed_args = []
-        for updator in _args:
-            match_obj = updator_pattern.fullmatch(updator.replace("\n", ""))
-            if match_obj:
-                uri_, data = match_obj.group(1, 2)
-                if args_root is None:
-                    uri = uri_
-                else:
-                    uri = _SEP.join([args_root, uri_])
-                # delay update if uri not exists:
-                try:
-                    router[uri]
-                except URINotFoundError as e:
-                    unparsed_args.append(updator)
-                    continue
-                # try parse data
-                try:
-                    data = json.loads(data)
-                except json.JSONDecodeError as e:
-                    raise ConfigParseError(f"Invalid JSON while parsing {data}, {e}.") from None
-                router[uri] = data  # this line updates root
-        return unparsed_args
-        
-    args = deepcopy(args if args is not None else sys.argv[1:])
-    unparsed_args = command_line_update(args)
-    
-    # parse block reference
-    def parse_json_block_reference(data, uri, failok=False):
-        if isinstance(data, dict):
-            for k in data:
-                data[k] = parse_json_block_reference(data[k], f"{uri}/{k}", failok)
-        elif isinstance(data, list):
-            data = [parse_json_block_reference(d, f"{uri}/{i}", failok) for i, d in enumerate(data)]
+class _Resolver:
+    """Resolves `cfg://` references and `__base__` inheritance of a config tree.
+
+    References and bases are edges of a dependency graph, which is resolved
+    depth-first: every node is resolved exactly once, after everything it
+    depends on, and every referenced uri is memoized. A node depending on
+    itself through a chain of edges raises `ReferenceCycleError`."""
+
+    def __init__(self, router:"ConfigContainer", resolved=None, structured=None, stats=None, overlay=None,
+                 cfg_root=None) -> None:
+        self.router = router
+        self.cfg_root = cfg_root
+        """directory binary files are referenced from, the working directory if None."""
+        self.stats = stats
+        """`PhaseStats` counting references, inheritance and copies, if profiling."""
+        self.overlay = overlay
+        """`Overlay` of the nodes shared by inheritance instead of deep-copied, in overlay mode."""
+        self.memo = {}
+        """resolved value of referenced uris."""
+        self.resolved = {} if resolved is None else resolved
+        """id to containers whose subtree is resolved, which also keeps their ids unique."""
+        self.structured = {} if structured is None else structured
+        """id to dicts whose `__base__` and nested keys are applied."""
+        self.chain = []
+        """uri and kind of nodes being resolved, for reporting cycles."""
+        self.active = {}
+        """position of nodes being resolved in `chain`."""
+
+    def resolve_tree(self):
+        root = self.router.data
+        for k in root:
+            root[k] = self._resolve_value(root[k], f"{_PTC}{k}")
+        return root
+
+    def resolve(self, uri):
+        """Resolve the subtree at `uri` and everything it references."""
+        return self._resolve_reference(uri, None)
+
+    def _enter(self, uri, node):
+        if node in self.active:
+            cycle = []
+            for u, _ in self.chain[self.active[node]:] + [(uri, node)]:
+                if not len(cycle) or cycle[-1] != u:
+                    cycle.append(u)
+            if len(cycle) == 1:
+                cycle.append(uri)
+            raise ReferenceCycleError(f"Reference cycle detected: {' -> '.join(cycle)}")
+        self.active[node] = len(self.chain)
+        self.chain.append((uri, node))
+
+    def _exit(self):
+        _, node = self.chain.pop()
+        del self.active[node]
+
+    def _resolve_value(self, data, uri):
+        if isinstance(data, (dict, list)):
+            self._resolve_node(data, uri)
         elif isinstance(data, str) and data.startswith(_PTC) and data != undefined:
-            backup_data = data
-            try:
-                if ".json" not in data:  # will be interpret as a relative uri
-                    data = f"{uri[:uri.rfind(_SEP)]}/{_remove_protocol_prefix(data)}"
-                data = router[data]
-                if isinstance(data, ConfigContainer):
-                    data = data.data
-            except Exception as e:
-                if not failok:
-                    raise type(e)(f"{e.args[0]}\nConfig origin: {uri}") from None
-                data = backup_data
+            if is_sidecar(data) and self._is_binary(data, uri):
+                return self._resolve_binary(data, uri)
+            if ".json" not in data:  # will be interpret as a relative uri
+                data = f"{uri[:uri.rfind(_SEP)]}/{_remove_protocol_prefix(data)}"
+            data = self._resolve_reference(data, uri)
         return data
-    
-    # first time parsing might fail because inheritance is not parsed yet.
-    parse_json_block_reference(root, _PTC[:-1], failok=True)
 
-    # parse inheritance
-    def parse_inheritance(data, uri):
+    def _resolve_node(self, data, uri):
+        if id(data) in self.resolved:
+            return
+        self._enter(uri, ("node", id(data)))
         if isinstance(data, dict):
-            if _BSE in data:
-                base:Dict = deepcopy(parse_inheritance(data[_BSE], f"{uri}/{_BSE}"))
-                if not isinstance(base, abc.Mapping):
-                    raise ConfigParseError(f"Unable to inherit the base object since it is not parsed as a dict. The base object is: {repr(base)}\nConfig origin: '{uri}/{_BSE}'")
-                data.pop(_BSE)
-                base.update(data)
-                data.update(base)
-            for k in list(data.keys()):
-                if "/" in k:
-                    try:
-                        ConfigContainer(data)[k] = parse_inheritance(data.pop(k), f"{uri}/{k}")
-                    except KeyError as e:
-                        msg = f"While addressing '{e.args[0]}', inheritance key '{k}' does not exist.\nConfig origin: {uri}"
-                        raise URINotFoundError(msg) from None
-                else:
-                    data[k] = parse_inheritance(data[k], f"{uri}/{k}")
-        elif isinstance(data, list):
-            data = [parse_inheritance(_, f"{uri}/{i}") for i, _ in enumerate(data)]
+            self._apply_inheritance(data, uri)
+            for k in data:
+                data[k] = self._resolve_value(data[k], f"{uri}/{k}")
+        else:
+            for i, d in enumerate(data):
+                data[i] = self._resolve_value(d, f"{uri}/{i}")
+        self._exit()
+        self.resolved[id(data)] = data
+
+    def _resolve_reference(self, target, origin):
+        keys = self.router._split_uri(target)
+        uri = f"{_PTC}{_SEP.join(keys)}"
+        if uri in self.memo:
+            if self.stats is not None:
+                self.stats.count("reference_hits")
+            return self.memo[uri]
+        if self.stats is not None:
+            self.stats.count("references")
+        self._enter(uri, ("reference", uri))
+        try:
+            data = self._lookup(self.router.data, keys)
+        except KeyError as e:
+            key, item = e.args
+            msg = f"While addressing '{target}', key '{key}' does not exist"
+            if isinstance(item, (dict, list)):
+                msg += f", available keys are {[k for k in item]}"
+            if origin is not None:
+                msg += f"\nConfig origin: {origin}"
+            raise URINotFoundError(msg) from None
+        data = self._resolve_value(data, uri)
+        self._exit()
+        self.memo[uri] = data
         return data
-    
-    parse_inheritance(root, _PTC[:-1])
-    
-    # parse_json_block_reference again
-    try:
-        parse_json_block_reference(root, _PTC[:-1], failok=False)
-    except Exception as e:
-        raise type(e)(*e.args) from None
 
-    # parse python objects
-    def parse_python_objects(data, uri):
-        if isinstance(data, dict):
-            for k in data:
-                if k.startswith("__"): continue
-                data[k] = parse_python_objects(data[k], f'{uri}/{k}')
-            if _MOD in data and _CLS in data:
-                try:
-                    module = importlib.import_module(data[_MOD])
-                except ModuleNotFoundError as e:
-                    raise ConfigParseError(f"Trying to import '{data[_MOD]}', but n{str(e.args[0])[1:]}. Check your PYTHONPATH.\nConfig origin: '{uri}'")
-                try:
-                    klass = getattr(module, data[_CLS])
-                except AttributeError as e:
-                    raise ConfigParseError(f"{str(e.args[0])}\nConfig origin: '{uri}'")
+    def _binary_path(self, target):
+        return osp.abspath(osp.join(self.cfg_root or "", osp.normpath(_remove_protocol_prefix(target))))
+
+    def _is_binary(self, target, origin):
+        """Whether the reference `target`, with the suffix of a binary file,
+        addresses an existing file under `cfg_root` rather than a key."""
+        if not osp.isfile(self._binary_path(target)):
+            return False
+        if ".json" not in target:  # a relative uri, as a key.
+            target = f"{origin[:origin.rfind(_SEP)]}/{_remove_protocol_prefix(target)}"
+        try:
+            self._lookup(self.router.data, self.router._split_uri(target))
+        except KeyError:
+            return True
+        return False
+
+    def _resolve_binary(self, target, origin):
+        uri = f"{_PTC}{osp.normpath(_remove_protocol_prefix(target))}"
+        if uri in self.memo:
+            return self.memo[uri]
+        path = self._binary_path(target)
+        if self.stats is not None:
+            self.stats.count("binary_files")
+        self.memo[uri] = BinaryArray(uri, path)
+        return self.memo[uri]
+
+    def _lookup(self, item, keys, uri=_PTC[:-1], copy_shared=False):
+        """Address `keys` from `item`, following references and applying
+        inheritance of the dicts on the way. Raises `KeyError(key, item)`.
+        If `copy_shared`, nodes on the way borrowed by overlay inheritance
+        are replaced by copies, to be written."""
+        view = None
+        for key in keys:
+            if (isinstance(item, dict) and item is not self.router.data and id(item) not in self.structured
+                    and not self._own_key(item, key)):
+                self._apply_inheritance(item, uri)
+            uri = f"{uri}/{key}"
+            try:
+                child = ConfigContainer._get_item_from_list_or_dict(item, key)
+            except ConfigParseError:
+                raise
+            except Exception:
+                raise KeyError(key, item) from None
+            if isinstance(child, str) and child.startswith(_PTC) and child != undefined:
+                child = self._resolve_value(child, uri)
+                ConfigContainer._set_item_from_list_or_dict(item, key, child)
+            if copy_shared:
+                copied, view, _ = self.overlay.enter(item, key, child, view)
+                if copied is not child:
+                    child = self.resolved[id(copied)] = copied
+                    if isinstance(child, dict):
+                        self.structured[id(child)] = child
+                    if self.stats is not None:
+                        self.stats.count("copied_nodes")
+            item = child
+        return item
 
-                # fill omitted params with defaults
+    @staticmethod
+    def _own_key(data:dict, key):
+        """Whether `key` of `data` can be addressed before its inheritance is
+        applied: it is not inherited from the base, and no "a/b" key sets
+        a value in it."""
+        if key not in data or key == _BSE:
+            return False
+        prefix = f"{key}/"
+        return not any(k.startswith(prefix) for k in data if isinstance(k, str))
+
+    def _apply_inheritance(self, data:dict, uri):
+        if id(data) in self.structured:
+            return
+        self._enter(uri, ("inheritance", id(data)))
+        self.structured[id(data)] = data
+        if _BSE in data:
+            base = self._resolve_value(data[_BSE], f"{uri}/{_BSE}")
+            if not isinstance(base, abc.Mapping):
+                raise ConfigParseError(f"Unable to inherit the base object since it is not parsed as a dict. The base object is: {repr(base)}\nConfig origin: '{uri}/{_BSE}'")
+            data.pop(_BSE)
+            if self.overlay is not None:
+                # children borrow the values of the base, copied when written.
+                n = 0
+                for k, v in base.items():
+                    if k not in data:
+                        data[k] = v
+                        n += self.overlay.share(data, k, base)
+                if self.stats is not None:
+                    self.stats.count("inheritances")
+                    self.stats.count("shared_nodes", n)
+            else:
+                self._deepcopy_base(data, base)
+        for k in list(data.keys()):
+            if "/" in k:
+                if self.stats is not None:
+                    self.stats.count("nested_keys")
+                keys = self.router._split_uri(k)
                 try:
-                    for k, param in _get_parameters(klass):
-                        if param.kind in (Parameter.POSITIONAL_OR_KEYWORD, Parameter.KEYWORD_ONLY):
-                            if k in data:
-                                continue
-                            elif param.default is Parameter.empty:
-                                data[k] = undefined
-                            else:
-                                pass
-                except ValueError as e:
-                    if "no signature found" in e.args[0]: pass
-        elif isinstance(data, list):
-            data = [parse_python_objects(_, f'{uri}/{i}') for i, _ in enumerate(data)]
-        return data
+                    parent = self._lookup(data, keys[:-1], uri, copy_shared=self.overlay is not None)
+                except KeyError as e:
+                    msg = f"While addressing '{e.args[0]}', inheritance key '{k}' does not exist.\nConfig origin: {uri}"
+                    raise URINotFoundError(msg) from None
+                if self.overlay is not None:
+                    self.overlay.write(parent, keys[-1], data.pop(k))
+                else:
+                    ConfigContainer._set_item_from_list_or_dict(parent, keys[-1], data.pop(k))
+        self._exit()
+
+    def _deepcopy_base(self, data, base):
+        # the copies share one memo, to keep references between them.
+        memo = {}
+        start = time.perf_counter() if self.stats is not None else None
+        for k, v in base.items():
+            if k not in data:
+                data[k] = deepcopy(v, memo)
+        if self.stats is not None:
+            self.stats.count("inheritances")
+            self.stats.count("deepcopy_seconds", time.perf_counter() - start)
+            self.stats.count("deepcopied_nodes", sum(isinstance(v, (dict, list)) for v in memo.values()))
+        for k, v in memo.items():
+            if k != id(memo) and isinstance(v, (dict, list)):
+                self.resolved[id(v)] = v
+                self.structured[id(v)] = v
 
+def _list_cfg_files(cfg_root):
+    cfg_file_glob_pattern = osp.join(cfg_root, "**", "*.json")
+    return glob.glob(cfg_file_glob_pattern, recursive=True)
+
+def _default_decoder():
+    """`orjson.loads` if it is installed, else `json.loads`."""
     try:
-        parse_python_objects(root, _PTC[:-1])
-    except ConfigParseError as e:
-        raise ConfigParseError(str(e)) from None
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
 
-    # command line update again (this time including expanded and inherited fields.)
-    unparsed_args = command_line_update(unparsed_args)
-    
+def _load_cfg_file(cfg_file, decoder=None):
+    with open(cfg_file, "rb") as _f:
+        content = _f.read()
+    if not len(content): # empty (but existing) file
+        return {}
+    if decoder is not None and decoder is not json.loads:
+        try:
+            return decoder(content)
+        except Exception:
+            pass  # json extensions such as NaN, and error messages, are left to `json`.
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ConfigParseError(f"While parsing {cfg_file}, {e}.") from None
+
+def _load_cfg_files(cfg_root, cfg_files, decoder=None, max_workers=None):
+    """Read and decode `cfg_files` on a thread pool, keyed by their address
+    relative to `cfg_root` in the order of `cfg_files`."""
+    if max_workers == 1 or len(cfg_files) < 2:
+        contents = [_load_cfg_file(cfg_file, decoder) for cfg_file in cfg_files]
+    else:
+        with ThreadPoolExecutor(max_workers) as pool:
+            futures = [pool.submit(_load_cfg_file, cfg_file, decoder) for cfg_file in cfg_files]
+            # the first error in file order is raised, regardless of completion order.
+            contents = [future.result() for future in futures]
+    return {osp.relpath(cfg_file, cfg_root): content for cfg_file, content in zip(cfg_files, contents)}
+
+class _LazyRoot(dict):
+    """A root dict that loads a json file the first time its address is looked up."""
+
+    def __init__(self, cfg_root, decoder=None) -> None:
+        super().__init__()
+        self.cfg_root = cfg_root
+        self.decoder = decoder
+
+    def __missing__(self, cfg_addr):
+        cfg_file = osp.join(self.cfg_root, cfg_addr)
+        if not isinstance(cfg_addr, str) or not cfg_addr.endswith(".json") \
+                or osp.normpath(cfg_addr) != cfg_addr or not osp.isfile(cfg_file):
+            raise KeyError(cfg_addr)
+        cfg_data = self[cfg_addr] = _load_cfg_file(cfg_file, self.decoder)
+        return cfg_data
+
+
+_UPDATOR = re.compile("^--(.*?)=(.*)")
+
+def _parse_command_line_arg(updator, args_root=None):
+    """Split a `--uri=json` command line update into its full uri and json
+    string, None if `updator` is not an update."""
+    match_obj = _UPDATOR.fullmatch(updator.replace("\n", ""))
+    if not match_obj:
+        return None
+    uri_, data = match_obj.group(1, 2)
+    if args_root is None:
+        uri = uri_
+    else:
+        uri = _SEP.join([args_root, uri_])
+    return uri, data
+
+def _command_line_update(router, _args, args_root=None, updated_uris=None):
+    """Use command line options to update json configs, returns the options
+    whose uri does not exist (yet)."""
+    unparsed_args = []
+    for updator in _args:
+        parsed = _parse_command_line_arg(updator, args_root)
+        if parsed is not None:
+            uri, data = parsed
+            # delay update if uri not exists:
+            try:
+                router[uri]
+            except URINotFoundError as e:
+                unparsed_args.append(updator)
+                continue
+            # try parse data
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError as e:
+                raise ConfigParseError(f"Invalid JSON while parsing {data}, {e}.") from None
+            router[uri] = data  # this line updates root
+            if updated_uris is not None:
+                updated_uris.append(uri)
+    return unparsed_args
+
+def _check_unparsed_args(router, unparsed_args, args_root=None):
     if len(unparsed_args):
         
         try:
@@ -491,5 +1508,236 @@ def parse_configs(cfg_root:Union[str, Dict], args=None, args_root=None) -> Confi
         
         raise ConfigParseError(
             f"Some command args are not found in the config definition thus failed to be updated. They are [{unparsed_args_}]. Please double check the URI path.")
+
+def _parse_python_objects(data, uri, parsed_objects, imported_modules, profile=None):
+    """Fill omitted required parameters of python object builders with `undefined`."""
+    # referenced nodes are shared, only parse them once.
+    if isinstance(data, (dict, list)):
+        if id(data) in parsed_objects:
+            return data
+        parsed_objects[id(data)] = data
+    if isinstance(data, dict):
+        for k in data:
+            if k.startswith("__"): continue
+            data[k] = _parse_python_objects(data[k], f'{uri}/{k}', parsed_objects, imported_modules, profile)
+        if _MOD in data and _CLS in data:
+            start = time.perf_counter() if profile is not None else None
+            try:
+                klass = callable_cache.resolve(data[_MOD], data[_CLS])
+            except ModuleNotFoundError as e:
+                raise ConfigParseError(f"Trying to import '{data[_MOD]}', but n{str(e.args[0])[1:]}. Check your PYTHONPATH.\nConfig origin: '{uri}'")
+            except AttributeError as e:
+                raise ConfigParseError(f"{str(e.args[0])}\nConfig origin: '{uri}'")
+            imported_modules.add(data[_MOD])
+            if profile is not None:
+                profile.add_import(data[_MOD], time.perf_counter() - start)
+                profile.phases["python objects"].count("builders")
+
+            # fill omitted params with defaults
+            for k in callable_cache.required_parameters(data[_MOD], data[_CLS], klass):
+                if k not in data:
+                    data[k] = undefined
+    elif isinstance(data, list):
+        for i, d in enumerate(data):
+            data[i] = _parse_python_objects(d, f'{uri}/{i}', parsed_objects, imported_modules, profile)
+    return data
+
+
+def parse_configs(cfg_root:Union[str, Dict], args=None, args_root=None, cache_file=None, lazy=False,
+                  decoder=None, max_workers=None, profile:ParseProfile=None, defer_imports=False,
+                  index=False, server=None, overlay=False) -> ConfigContainer:
+    """This function load all json config files in `cfg_root`,
+    updates it with command line options, follows and substitute
+    the `cfg://` block references.
+    
+    If `cache_file` is given (only for directory `cfg_root`), the resolved
+    tree is stored there and reused by later calls as long as no json file
+    under `cfg_root` or imported python source has changed.
+
+    If `lazy` is set (only for directory `cfg_root` and given `args_root`),
+    json files are loaded the first time they are addressed, and only the
+    subtree reachable from `args_root` is resolved. Other parts of the tree
+    are returned as loaded.
+
+    Json files are read by a pool of `max_workers` threads (sequentially if
+    it is 1), and decoded by `decoder`, a callable taking the `bytes` of a
+    file, which defaults to `orjson.loads` if installed. Files it fails to
+    decode are decoded again by `json.loads`.
+
+    If a `ParseProfile` is given as `profile`, the time and counters of
+    each phase are recorded into it.
+
+    If `defer_imports` is set, modules of python object builders are not
+    imported by parsing. Omitted required parameters of a builder are filled
+    with `undefined` when it is first accessed or called, from a signature
+    table persisted next to `cache_file` if given, else by importing it.
+
+    If `index` is set (not in `lazy` mode), a `ConfigIndex` of the resolved
+    tree is built for exact uri lookups, `uris()` and wildcard `query()`.
+
+    If `server` is set (True, or the path of its socket), the tree is asked
+    from a running `cfgopt-server` of `cfg_root`, with only the subtree at
+    `args_root` if given, and parsed locally if no server is running.
+
+    If `overlay` is set, dicts inheriting a `__base__` share its values
+    instead of deep copies, and the shared dicts and lists are only copied
+    on the path of a value set through `ConfigContainer.__setitem__` (e.g.,
+    by an "a/b" key or a command-line update), so that every dict sees the
+    same values as with deep copies, including through `cfg://` references."""
+
+    phase = null_phase if profile is None else profile.phase
+    if server and isinstance(cfg_root, str):
+        from .server import request_configs
+        with phase("server") as stats:
+            router = request_configs(cfg_root, args, args_root, None if server is True else server)
+            if stats is not None:
+                stats.count("hits", router is not None)
+        if router is not None:
+            if profile is not None:
+                profile.finish()
+            return router
+    cache = None
+    lazy = lazy and args_root is not None
+    if decoder is None:
+        decoder = _default_decoder()
+    with phase("load") as stats:
+        if isinstance(cfg_root, str):
+
+            if PARSE_ROOT[0] is not None:
+                cfg_root = osp.join(PARSE_ROOT[0], cfg_root)
+            if not osp.isdir(cfg_root):
+                raise TypeError(f"`cfg_root` (\"{cfg_root}\") is not a directory.")
+            if lazy and cache_file is not None:
+                raise TypeError("`cache_file` is not supported in `lazy` mode.")
+            if lazy and index:
+                raise TypeError("`index` is not supported in `lazy` mode.")
+            cfg_files = [] if lazy else _list_cfg_files(cfg_root)
+            if cache_file is not None:
+                key = cache_key(osp.abspath(cfg_root), HOSTNAME, bool(defer_imports), bool(overlay))
+                if defer_imports:
+                    callable_cache.load_signatures(f"{cache_file}.signatures")
+                cache = ParseCache.load(cache_file)
+                if cache is not None and not cache.is_valid(key, cfg_files, max_workers):
+                    cache = None
+                if cache is None:
+                    cache = ParseCache(key, stat_files(cfg_files, max_workers), {}, None)
+                elif stats is not None:
+                    stats.count("cache_hits")
+            # load raw data from json files
+            if cache is not None and cache.raw_bytes is not None:
+                root = None
+            elif lazy:
+                root = _LazyRoot(cfg_root, decoder)
+            else:
+                root = _load_cfg_files(cfg_root, cfg_files, decoder, max_workers)
+                if cache is not None:
+                    cache.raw_bytes = pickle.dumps(root, protocol=pickle.HIGHEST_PROTOCOL)
+            if stats is not None:
+                stats.count("files", len(cfg_files))
+        elif isinstance(cfg_root, dict):
+            root = cfg_root
+            lazy = False
+        else:
+            raise TypeError(f"Type of `cfg_root` not supported, expect directory string or a dict, got `{type(cfg_root)}`.")
+
+    router = ConfigContainer(root)
+    router._deferred = bool(defer_imports)
+    if overlay:
+        router._overlay = Overlay()
+
+    # use command line options to update json configs
+    updated_uris = []
+    def command_line_update(_args, stats):
+        n = len(updated_uris)
+        unparsed_args = _command_line_update(router, _args, args_root, updated_uris)
+        if stats is not None:
+            stats.count("updates", len(updated_uris) - n)
+            stats.count("deferred", len(unparsed_args))
+        return unparsed_args
+        
+    args = deepcopy(args if args is not None else sys.argv[1:])
+    expanded = False
+    with phase("update before expansion") as stats:
+        if root is None:
+            # warm cache: the resolved tree is reused unless some args update the tree before expansion.
+            if len(args) or cache.resolved_bytes is None:
+                root = router.data = cache.raw()
+                unparsed_args = command_line_update(args, stats)
+            else:
+                unparsed_args = args
+            if len(updated_uris):
+                cache = None
+            elif cache.resolved_bytes is not None:
+                root = cache.resolved()
+                if overlay:
+                    root, router._overlay = root
+                router.data = root
+                expanded = True
+        else:
+            unparsed_args = command_line_update(args, stats)
+    
+    imported_modules = set()
+    parsed_objects = {}
+
+    if not expanded:
+        with phase("resolve") as stats:
+            resolver = _Resolver(router, stats=stats, overlay=router._overlay,
+                                 cfg_root=cfg_root if isinstance(cfg_root, str) else None)
+            try:
+                if lazy:
+                    resolved_root = resolver.resolve(args_root)
+                else:
+                    resolved_root = resolver.resolve_tree()
+            except Exception as e:
+                raise type(e)(*e.args) from None
+            if stats is not None:
+                stats.count("nodes", len(resolver.resolved))
+                if lazy:
+                    stats.count("files", len(root))
+
+        if not defer_imports:
+            with phase("python objects") as stats:
+                try:
+                    uri = f"{_PTC}{_remove_protocol_prefix(args_root)}" if lazy else _PTC[:-1]
+                    _parse_python_objects(resolved_root, uri, parsed_objects, imported_modules, profile)
+                except ConfigParseError as e:
+                    raise ConfigParseError(str(e)) from None
+                if stats is not None:
+                    stats.count("modules", len(imported_modules))
+
+        if cache is not None:
+            with phase("cache"):
+                # a tree updated before expansion is only valid for this launch.
+                if not len(updated_uris):
+                    # the overlay is pickled along, to copy shared nodes when written after loading.
+                    resolved = (root, router._overlay) if overlay else root
+                    cache.resolved_bytes = pickle.dumps(resolved, protocol=pickle.HIGHEST_PROTOCOL)
+                modules = [sys.modules.get(m) for m in imported_modules]
+                module_files = [m.__file__ for m in modules if getattr(m, "__file__", None)]
+                module_files += [v.path for v in resolver.memo.values() if isinstance(v, BinaryArray)]
+                cache.modules = stat_files(module_files)
+                try:
+                    cache.dump(cache_file)
+                except OSError as e:
+                    # the cache is only a speed-up.
+                    warnings.warn(f"Unable to write the parse cache {cache_file}: {e}", RuntimeWarning)
+
+    if index:
+        with phase("index") as stats:
+            router.build_index()
+            if stats is not None:
+                stats.count("nodes", len(router._index))
+
+    with phase("update after expansion") as stats:
+        # command line update again (this time including expanded and inherited fields.)
+        unparsed_args = command_line_update(unparsed_args, stats)
     
+        _check_unparsed_args(router, unparsed_args, args_root)
+
+    if defer_imports and cache_file is not None and isinstance(cfg_root, str):
+        # builders addressed after parsing are persisted when the process exits.
+        callable_cache.dump_signatures(f"{cache_file}.signatures", at_exit=True)
+
+    if profile is not None:
+        profile.finish()
     return router
@@ -0,0 +1,87 @@
+import time
+from contextlib import contextmanager
+
+
+class PhaseStats:
+    """Wall time and counters of a parsing phase."""
+
+    def __init__(self, name) -> None:
+        self.name = name
+        self.seconds = 0.
+        self.counters = {}
+
+    def count(self, counter, n=1):
+        self.counters[counter] = self.counters.get(counter, 0) + n
+
+    def as_dict(self):
+        return dict(seconds=self.seconds, **self.counters)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self.name!r}, seconds={self.seconds:.6f}, counters={self.counters!r})"
+
+
+class ParseProfile:
+    """Per-phase instrumentation of `parse_configs()`, which fills it when
+    passed as `profile`.
+
+    `phases` maps phase names to `PhaseStats` in the order they ran, and
+    `imports` maps module names to the seconds spent importing them and
+    looking up their callables. `hook`, if given, is called with the
+    profile when parsing finishes, e.g., to feed the numbers into metrics."""
+
+    def __init__(self, hook=None) -> None:
+        self.phases = {}
+        self.imports = {}
+        self.hook = hook
+
+    @contextmanager
+    def phase(self, name):
+        stats = self.phases.get(name)
+        if stats is None:
+            stats = self.phases[name] = PhaseStats(name)
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats.seconds += time.perf_counter() - start
+
+    def add_import(self, module_name, seconds):
+        self.imports[module_name] = self.imports.get(module_name, 0.) + seconds
+
+    @property
+    def seconds(self):
+        return sum(stats.seconds for stats in self.phases.values())
+
+    def finish(self):
+        if self.hook is not None:
+            self.hook(self)
+
+    def as_dict(self):
+        return dict(
+            seconds=self.seconds,
+            phases={name: stats.as_dict() for name, stats in self.phases.items()},
+            imports=dict(self.imports),
+        )
+
+    def report(self):
+        """A human readable table of the phases and the slowest imports."""
+        lines = [f"{'phase':<24} {'seconds':>10}  counters"]
+        for name, stats in self.phases.items():
+            counters = ", ".join(f"{k}={v:.6f}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.counters.items())
+            lines.append(f"{name:<24} {stats.seconds:>10.6f}  {counters}")
+        lines.append(f"{'total':<24} {self.seconds:>10.6f}")
+        if len(self.imports):
+            lines.append("")
+            lines.append(f"{'import':<48} {'seconds':>10}")
+            for module_name, seconds in sorted(self.imports.items(), key=lambda item: -item[1]):
+                lines.append(f"{module_name:<48} {seconds:>10.6f}")
+        return "\n".join(lines)
+
+    def __str__(self) -> str:
+        return self.report()
+
+
+@contextmanager
+def null_phase(name):
+    """Stands for `ParseProfile.phase` when not profiling."""
+    yield None
@@ -0,0 +1,240 @@
+"""A long-lived process keeping a config directory parsed, which serves
+the resolved subtrees of recipes to `parse_configs(..., server=True)` and
+`cfgoptrun --server` over a Unix domain socket.
+
+    cfgopt-server -d cfg [--socket PATH] [--interval 1]
+"""
+import argparse
+import hashlib
+import os
+import os.path as osp
+import pickle
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+
+from .parser import ConfigContainer, ConfigParseError, URINotFoundError, _parse_command_line_arg
+from .session import ConfigSession
+from .utils import PARSE_ROOT
+
+_LENGTH = struct.Struct("<Q")
+_ERRORS = {"ConfigParseError": ConfigParseError, "URINotFoundError": URINotFoundError}
+
+
+def default_socket_path(cfg_root):
+    """The socket a server of `cfg_root` listens on by default, unique for
+    the user and the directory, in the private `$XDG_RUNTIME_DIR` if set."""
+    digest = hashlib.sha1(osp.abspath(cfg_root).encode()).hexdigest()[:16]
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and osp.isdir(runtime_dir):
+        return osp.join(runtime_dir, f"cfgopt-{digest}.sock")
+    return osp.join(tempfile.gettempdir(), f"cfgopt-{os.getuid()}-{digest}.sock")
+
+
+def _peer_uid(sock):
+    """The uid of the process on the other end of the connected Unix socket `sock`, None if unknown."""
+    if not hasattr(socket, "SO_PEERCRED"):  # linux only
+        return None
+    _, uid, _ = struct.unpack("3i", sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")))
+    return uid
+
+
+def _send(sock, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_LENGTH.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, n):
+    chunks = []
+    while n > 0:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not len(chunk):
+            raise ConnectionError("Connection closed by the config server.")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv(sock):
+    n, = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return pickle.loads(_recv_exactly(sock, n))
+
+
+def _nest(data, args_root):
+    """A root container with `data` at `args_root`, and nothing else."""
+    for key in reversed(ConfigContainer._split_uri(args_root)):
+        data = {key: data}
+    return ConfigContainer(data)
+
+
+def request_configs(cfg_root, args=None, args_root=None, socket_path=None, timeout=60.):
+    """Ask the server of `cfg_root` for the tree updated by command line
+    `args`, as `parse_configs()` returns it, but with only the subtree at
+    `args_root` if given. None if no server listens on `socket_path`, or
+    if it does not answer within `timeout` seconds.
+
+    Raises `PermissionError` if the server is run by another user, since
+    its answer is unpickled."""
+    if PARSE_ROOT[0] is not None:
+        cfg_root = osp.join(PARSE_ROOT[0], cfg_root)
+    if socket_path is None:
+        socket_path = default_socket_path(cfg_root)
+    args = list(args if args is not None else sys.argv[1:])
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError, socket.timeout):
+            return None
+        uid = _peer_uid(sock)
+        if uid is None:
+            uid = os.stat(socket_path).st_uid
+        if uid != os.getuid():
+            raise PermissionError(f"The config server on {socket_path} is run by uid {uid}, not by the current user.")
+        try:
+            _send(sock, dict(cfg_root=osp.abspath(cfg_root), args=args, args_root=args_root))
+            status, payload = _recv(sock)
+        except socket.timeout:
+            return None
+    finally:
+        sock.close()
+    if status != "ok":
+        error, msg = payload
+        raise _ERRORS.get(error, ConfigParseError)(msg)
+    return ConfigContainer(payload) if args_root is None else _nest(payload, args_root)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        uid = _peer_uid(self.connection)
+        if uid is not None and uid != os.getuid():
+            return  # the socket is only accessible by its user, unless the umask is not honored.
+        try:
+            request = _recv(self.connection)
+        except (ConnectionError, struct.error):
+            return
+        try:
+            payload = "ok", self.server.config_server.serve(**request)
+        except Exception as e:
+            payload = "error", (type(e).__name__, str(e))
+        _send(self.connection, payload)
+
+
+class ConfigServer:
+    """Keeps `cfg_root` parsed in a `ConfigSession`, polls it for modified
+    files every `interval` seconds, and answers `request_configs()` on the
+    Unix domain socket `socket_path` (see `default_socket_path()`).
+
+    Requests are answered from `session.variant(args)`, so that only the
+    files addressed by their updates (and the files referencing them) are
+    parsed again, and only the subtree at their `args_root` is sent."""
+
+    def __init__(self, cfg_root, socket_path=None, interval=1., decoder=None, max_workers=None) -> None:
+        self.session = ConfigSession(cfg_root, args=[], decoder=decoder, max_workers=max_workers)
+        self.cfg_root = osp.abspath(self.session.cfg_root)
+        self.socket_path = default_socket_path(self.cfg_root) if socket_path is None else socket_path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server = None
+
+    def serve(self, cfg_root, args, args_root=None):
+        if cfg_root != self.cfg_root:
+            raise ConfigParseError(f"The config server at {self.socket_path} serves {self.cfg_root}, not {cfg_root}.")
+        updates = []
+        for updator in args:
+            parsed = _parse_command_line_arg(updator, args_root)
+            if parsed is not None:
+                updates.append(f"--{parsed[0]}={parsed[1]}")
+        with self._lock:
+            cfg = self.session.variant(updates)
+        if args_root is None:
+            return cfg.data
+        data = cfg[args_root]
+        return data.data if isinstance(data, ConfigContainer) else data
+
+    def poll(self):
+        with self._lock:
+            return self.session.poll()
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                changed = self.poll()
+            except Exception as e:
+                # keep serving the last valid tree until the files are fixed.
+                print(f"cfgopt-server: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            if len(changed):
+                print(f"cfgopt-server: reloaded {len(changed)} changed uris.", file=sys.stderr)
+
+    def serve_forever(self):
+        """Listen on `socket_path` until `shutdown()`."""
+        if osp.exists(self.socket_path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+                raise OSError(f"A config server is already listening on {self.socket_path}.")
+            except ConnectionRefusedError:
+                os.remove(self.socket_path)  # left by a server that died.
+            finally:
+                probe.close()
+        umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, _Handler)
+        finally:
+            os.umask(umask)
+        self._server.daemon_threads = True
+        self._server.config_server = self
+        watcher = threading.Thread(target=self._watch, daemon=True)
+        watcher.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._stopped.set()
+            self._server.server_close()
+            try:
+                os.remove(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self):
+        self._stopped.set()
+        if self._server is not None:
+            self._server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a config directory parsed, and serve it to `cfgoptrun --server`.")
+    parser.add_argument(
+        "-d", "--cfgdir",
+        default="cfg",
+        help="config directory that maps to cfg:// root. (default: `cfg`)"
+    )
+    parser.add_argument(
+        "--socket",
+        default=None,
+        help="unix domain socket to listen on. (default: derived from the absolute path of `cfgdir`)"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.,
+        help="seconds between two polls of the config files. (default: 1)"
+    )
+    args = parser.parse_args()
+    server = ConfigServer(args.cfgdir, args.socket, args.interval)
+    print(f"cfgopt-server: serving {server.cfg_root} on {server.socket_path}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
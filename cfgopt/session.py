@@ -0,0 +1,391 @@
+import os.path as osp
+import json
+import pickle
+import sys
+import time
+from collections import ChainMap
+from itertools import islice
+
+from .cache import stat_files
+from .parser import (_BSE, _CLS, _MOD, _PTC, _SEP, ConfigContainer,
+                     _check_unparsed_args, _command_line_update,
+                     _default_decoder, _list_cfg_files, _load_cfg_files,
+                     _parse_command_line_arg, _parse_python_objects, _Resolver,
+                     undefined)
+from .utils import PARSE_ROOT
+
+
+def _references(data, uri, refs, overrides):
+    """Collect the `cfg://` references in the raw `data` at `uri` into `refs`,
+    keyed by the keys of the referencing node, and the keys of the nodes
+    overridden by "a/b" keys into `overrides`."""
+    if isinstance(data, dict):
+        for k, v in data.items():
+            if _SEP in k:
+                overrides.add(tuple(ConfigContainer._split_uri(f"{uri}/{k}")))
+            _references(v, f"{uri}/{k}", refs, overrides)
+    elif isinstance(data, list):
+        for i, v in enumerate(data):
+            _references(v, f"{uri}/{i}", refs, overrides)
+    elif isinstance(data, str) and data.startswith(_PTC) and data != undefined:
+        if ".json" not in data:  # relative uri
+            data = f"{uri[:uri.rfind(_SEP)]}/{data[len(_PTC):]}"
+        refs[tuple(ConfigContainer._split_uri(uri))] = tuple(ConfigContainer._split_uri(data))
+    return refs, overrides
+
+
+def _aliased(root):
+    """ids of the containers with more than one parent in the tree `root`."""
+    seen, aliased, pending = set(), set(), list(root.values())
+    while len(pending):
+        data = pending.pop()
+        if not isinstance(data, (dict, list)):
+            continue
+        if id(data) in seen:
+            aliased.add(id(data))
+            continue
+        seen.add(id(data))
+        pending.extend(data.values() if isinstance(data, dict) else data)
+    return aliased
+
+
+def _is_plain(data):
+    """Whether `data` is left as it is by parsing, i.e., it has no reference,
+    inheritance or python object."""
+    if isinstance(data, dict):
+        return all(k not in (_BSE, _MOD, _CLS) and _SEP not in k and _is_plain(v) for k, v in data.items())
+    elif isinstance(data, list):
+        return all(_is_plain(v) for v in data)
+    elif isinstance(data, str):
+        return not data.startswith(_PTC)
+    return True
+
+
+def _added_keys(state, n):
+    """Keys added to the dict `state` since it had `n` keys."""
+    return list(islice(reversed(state), len(state) - n))
+
+
+def _diff(old, new, uri, changed):
+    """Append the uris where `old` and `new` differ to `changed`."""
+    if old is new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for k in old:
+            if k not in new:
+                changed.append(f"{uri}/{k}")
+        for k in new:
+            if k not in old:
+                changed.append(f"{uri}/{k}")
+            else:
+                _diff(old[k], new[k], f"{uri}/{k}", changed)
+    elif isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        for i, (o, n) in enumerate(zip(old, new)):
+            _diff(o, n, f"{uri}/{i}", changed)
+    else:
+        try:
+            equal = type(old) == type(new) and bool(old == new)
+        except Exception:
+            equal = False
+        if not equal:
+            changed.append(uri)
+
+
+class ConfigSession:
+    """A config directory parsed once and kept up to date for long-lived
+    processes, e.g., notebooks and interactive tuning.
+
+    `reload()` (or `poll()`, which finds modified files by their mtime and
+    size) loads the given files again, and only parses again these files
+    and the files that reference them, directly or indirectly, including
+    command line updates addressing them. Files are replaced in `root` in
+    place, address it again after a reload to get the new values."""
+
+    def __init__(self, cfg_root:str, args=None, args_root=None, decoder=None, max_workers=None) -> None:
+        if PARSE_ROOT[0] is not None:
+            cfg_root = osp.join(PARSE_ROOT[0], cfg_root)
+        if not isinstance(cfg_root, str) or not osp.isdir(cfg_root):
+            raise TypeError(f"`cfg_root` (\"{cfg_root}\") is not a directory.")
+        self.cfg_root = cfg_root
+        self.args = list(args if args is not None else sys.argv[1:])
+        self.args_root = args_root
+        self.decoder = _default_decoder() if decoder is None else decoder
+        self.max_workers = max_workers
+        self.root = ConfigContainer({})
+        """the parsed tree, updated in place."""
+        self._raw = {}
+        """pickled raw data of every file, before any update."""
+        self._stats = {}
+        self._refs, self._overrides = {}, {}
+        """references and "a/b" overrides in the raw data of each file, see `_references()`."""
+        self._depends = {}
+        """addresses of the files each file references."""
+        self._dependents = {}
+        """addresses of the files referencing each file."""
+        self._resolved, self._structured, self._parsed = {}, {}, {}
+        self._owned = {}
+        """ids added to the resolution states above while parsing each file."""
+        self._index = None
+        """observed keys and aliased ids of the tree, for `variant()`."""
+        self._updates = []
+        for updator in self.args:
+            parsed = _parse_command_line_arg(updator, args_root)
+            if parsed is not None:
+                cfg_addr = ConfigContainer._split_uri(parsed[0])[0]
+                self._updates.append((updator, cfg_addr))
+
+        cfg_files = _list_cfg_files(cfg_root)
+        stats = stat_files(cfg_files, max_workers)
+        loaded = _load_cfg_files(cfg_root, cfg_files, self.decoder, max_workers)
+        self._reparse(loaded, set())
+        self._stats = stats
+
+    def _cfg_addr(self, cfg_file):
+        return osp.relpath(osp.join(self.cfg_root, cfg_file), self.cfg_root)
+
+    def reload(self, cfg_files):
+        """Load `cfg_files` (paths absolute or relative to `cfg_root`) again,
+        and returns the uris changed in the tree."""
+        cfg_addrs = {self._cfg_addr(cfg_file) for cfg_file in cfg_files}
+        existing = [cfg_addr for cfg_addr in cfg_addrs if osp.isfile(osp.join(self.cfg_root, cfg_addr))]
+        removed = cfg_addrs.difference(existing)
+        paths = [osp.join(self.cfg_root, cfg_addr) for cfg_addr in existing]
+        stats = stat_files(paths, self.max_workers)
+        loaded = _load_cfg_files(self.cfg_root, paths, self.decoder, self.max_workers)
+        changed = self._reparse(loaded, removed)
+        self._stats.update(stats)
+        for cfg_addr in removed:
+            self._stats.pop(osp.join(self.cfg_root, cfg_addr), None)
+        return changed
+
+    def poll(self):
+        """Reload the files that are added, removed or modified since they
+        were loaded, and returns the uris changed in the tree."""
+        stats = stat_files(_list_cfg_files(self.cfg_root), self.max_workers)
+        modified = [cfg_file for cfg_file in set(stats).union(self._stats)
+                    if stats.get(cfg_file) != self._stats.get(cfg_file)]
+        if not len(modified):
+            return []
+        return self.reload(modified)
+
+    def watch(self, interval=1.):
+        """Poll every `interval` seconds, yield the changed uris whenever some file changes."""
+        while True:
+            changed = self.poll()
+            if len(changed):
+                yield changed
+            time.sleep(interval)
+
+    def _affected(self, cfg_addrs):
+        affected, pending = set(), list(cfg_addrs)
+        while len(pending):
+            cfg_addr = pending.pop()
+            if cfg_addr in affected:
+                continue
+            affected.add(cfg_addr)
+            pending.extend(self._dependents.get(cfg_addr, ()))
+        return affected
+
+    def _reparse(self, loaded, removed):
+        root = self.root.data
+        affected = self._affected(set(loaded).union(removed))
+        # parse the affected files next to the current tree, so that it is left untouched on errors.
+        staged = dict(root)
+        for cfg_addr in removed:
+            staged.pop(cfg_addr, None)
+        raw = {cfg_addr: pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL) for cfg_addr, data in loaded.items()}
+        for cfg_addr in affected.intersection(loaded):
+            staged.setdefault(cfg_addr, None)
+        # keep the order of files, for deterministic resolution and error messages.
+        affected = [cfg_addr for cfg_addr in staged if cfg_addr in affected]
+        for cfg_addr in affected:
+            staged[cfg_addr] = pickle.loads(raw[cfg_addr] if cfg_addr in raw else self._raw[cfg_addr])
+        router = ConfigContainer(staged)
+
+        updates = [updator for updator, cfg_addr in self._updates if cfg_addr in affected]
+        unparsed_args = _command_line_update(router, updates, self.args_root)
+        refs = {cfg_addr: _references(staged[cfg_addr], f"{_PTC}{cfg_addr}", {}, set()) for cfg_addr in affected}
+
+        resolver = _Resolver(router, self._resolved, self._structured, cfg_root=self.cfg_root)
+        states = (self._resolved, self._structured, self._parsed)
+        start, owned, imported_modules = [len(state) for state in states], {}, set()
+        try:
+            for cfg_addr in affected:
+                lengths = [len(state) for state in states]
+                data = resolver.resolve(cfg_addr)
+                _parse_python_objects(data, f"{_PTC}{cfg_addr}", self._parsed, imported_modules)
+                owned[cfg_addr] = [_added_keys(state, n) for state, n in zip(states, lengths)]
+            # command line update again (this time including expanded and inherited fields.)
+            unparsed_args = _command_line_update(router, unparsed_args, self.args_root)
+            _check_unparsed_args(router, unparsed_args, self.args_root)
+        except Exception as e:
+            for state, n in zip(states, start):
+                for i in _added_keys(state, n):
+                    del state[i]
+            raise type(e)(*e.args) from None
+
+        # commit the staged files, and report what changed.
+        changed = []
+        for cfg_addr in removed:
+            if cfg_addr in root:
+                changed.append(f"{_PTC}{cfg_addr}")
+                root.pop(cfg_addr)
+        for cfg_addr in affected:
+            if cfg_addr in root:
+                _diff(root[cfg_addr], staged[cfg_addr], f"{_PTC}{cfg_addr}", changed)
+            else:
+                changed.append(f"{_PTC}{cfg_addr}")
+            root[cfg_addr] = staged[cfg_addr]
+
+        for cfg_addr in set(affected).union(removed):
+            for state, ids in zip(states, self._owned.pop(cfg_addr, ())):
+                for i in ids:
+                    state.pop(i, None)
+            for dep in self._depends.pop(cfg_addr, ()):
+                self._dependents.get(dep, set()).discard(cfg_addr)
+            self._refs.pop(cfg_addr, None)
+            self._overrides.pop(cfg_addr, None)
+        self._owned.update(owned)
+        for cfg_addr, (file_refs, overrides) in refs.items():
+            self._refs[cfg_addr], self._overrides[cfg_addr] = file_refs, overrides
+            # relative references never leave their own file.
+            deps = self._depends[cfg_addr] = {target[0] for target in file_refs.values()} - {cfg_addr}
+            for dep in deps:
+                self._dependents.setdefault(dep, set()).add(cfg_addr)
+        self._raw.update(raw)
+        for cfg_addr in removed:
+            self._raw.pop(cfg_addr, None)
+        self._index = None
+        return changed
+
+    def _locate(self, keys):
+        """Follow the references on the way to the node at `keys`, returns
+        its keys in the file where it is defined."""
+        keys, n = tuple(keys), 2
+        while n < len(keys):
+            target = self._refs.get(keys[0], {}).get(keys[:n])
+            if target is None:
+                n += 1
+            else:
+                keys, n = target + keys[n:], 2
+        return keys
+
+    def variant(self, args):
+        """The tree parsed with command line `args` after the session's,
+        sharing everything they do not change with `root`.
+
+        Updates of plain values that no reference, `__base__` or "a/b" key
+        observes only copy the containers on their path. Otherwise, the
+        files they address and the files that reference them are parsed
+        again from the raw data, with the usual two-phase command line
+        update."""
+        args = list(args)
+        data = self._update_paths(args)
+        if data is None:
+            data = self._reparse_variant(args)
+        return ConfigContainer(data)
+
+    def variants(self, arg_lists):
+        """`variant()` for each list of command line args in `arg_lists`."""
+        return [self.variant(args) for args in arg_lists]
+
+    def _update_paths(self, args):
+        """Copy the paths to the updated nodes, None if some update may not be
+        applied this way."""
+        if self._index is None:
+            observed = set()
+            for cfg_addr, file_refs in self._refs.items():
+                observed.update(file_refs.values())
+                observed.update(self._overrides[cfg_addr])
+            prefixes = {keys[:n] for keys in observed for n in range(1, len(keys))}
+            self._index = observed, prefixes, _aliased(self.root.data)
+        observed, prefixes, aliased = self._index
+
+        updates = []
+        for updator in args:
+            parsed = _parse_command_line_arg(updator, self.args_root)
+            if parsed is None:
+                continue
+            keys = ConfigContainer._split_uri(parsed[0])
+            try:
+                data = json.loads(parsed[1])
+            except json.JSONDecodeError:
+                return None  # reported by the usual update.
+            location = self._locate(keys)
+            if len(keys) < 2 or not _is_plain(data) or location in prefixes \
+                    or any(location[:n] in observed for n in range(1, len(location) + 1)):
+                return None
+            updates.append((keys, data))
+
+        root, copied = dict(self.root.data), set()
+        for keys, data in updates:
+            item = root
+            for key in keys[:-1]:
+                try:
+                    child = ConfigContainer._get_item_from_list_or_dict(item, key)
+                except Exception:
+                    return None
+                if not isinstance(child, (dict, list)):
+                    return None
+                if id(child) not in copied:
+                    if id(child) in aliased:
+                        return None
+                    child = type(child)(child)
+                    copied.add(id(child))
+                    ConfigContainer._set_item_from_list_or_dict(item, key, child)
+                item = child
+            try:
+                ConfigContainer._get_item_from_list_or_dict(item, keys[-1])
+            except Exception:
+                return None
+            ConfigContainer._set_item_from_list_or_dict(item, keys[-1], data)
+        return root
+
+    def _reparse_variant(self, args):
+        addressed = set()
+        for updator in args:
+            parsed = _parse_command_line_arg(updator, self.args_root)
+            if parsed is not None:
+                keys = ConfigContainer._split_uri(parsed[0])
+                addressed.update((keys[0], self._locate(keys)[0]))
+        data = self._resolve_variant(self._affected(addressed), args)
+        if data is None:
+            # the updates write through references not seen in the raw data.
+            data = self._resolve_variant(set(self.root.data), args)
+        return data
+
+    def _resolve_variant(self, affected, args):
+        """Parse the `affected` files again next to `root` and update them by
+        `args`, None if an update after expansion addresses a node shared
+        with `root`."""
+        staged = dict(self.root.data)
+        affected = [cfg_addr for cfg_addr in staged if cfg_addr in affected]
+        for cfg_addr in affected:
+            staged[cfg_addr] = pickle.loads(self._raw[cfg_addr])
+        router = ConfigContainer(staged)
+        updates = [updator for updator, cfg_addr in self._updates if cfg_addr in affected] + args
+        unparsed_args = _command_line_update(router, updates, self.args_root)
+
+        # the states of `root` are chained, so that shared nodes are not parsed again.
+        resolver = _Resolver(router, ChainMap({}, self._resolved), ChainMap({}, self._structured), cfg_root=self.cfg_root)
+        parsed_objects = ChainMap({}, self._parsed)
+        try:
+            for cfg_addr in affected:
+                data = resolver.resolve(cfg_addr)
+                _parse_python_objects(data, f"{_PTC}{cfg_addr}", parsed_objects, set())
+        except Exception as e:
+            raise type(e)(*e.args) from None
+
+        for updator in unparsed_args:
+            keys = ConfigContainer._split_uri(_parse_command_line_arg(updator, self.args_root)[0])
+            item = staged
+            try:
+                for key in keys[:-1]:
+                    item = ConfigContainer._get_item_from_list_or_dict(item, key)
+            except Exception:
+                continue
+            if self._resolved.get(id(item)) is item:
+                return None
+        unparsed_args = _command_line_update(router, unparsed_args, self.args_root)
+        _check_unparsed_args(router, unparsed_args, self.args_root)
+        return staged
@@ -0,0 +1,199 @@
+import ast
+from collections import abc
+import mmap
+import os.path as osp
+import struct
+import sys
+
+_NPY_MAGIC = b"\x93NUMPY"
+
+_RAW_FORMATS = {
+    ".i8": "b", ".i16": "h", ".i32": "i", ".i64": "q",
+    ".u8": "B", ".u16": "H", ".u32": "I", ".u64": "Q",
+    ".f32": "f", ".f64": "d",
+}
+"""`struct` format of raw little-endian buffers by file extension."""
+
+_NPY_FORMATS = {
+    "b1": "?", "i1": "b", "i2": "h", "i4": "i", "i8": "q",
+    "u1": "B", "u2": "H", "u4": "I", "u8": "Q", "f4": "f", "f8": "d",
+}
+"""`struct` format by `.npy` type descriptor, without byte order."""
+
+_NUMPY_DTYPES = {"?": "bool", "b": "int8", "h": "int16", "i": "int32", "q": "int64",
+                 "B": "uint8", "H": "uint16", "I": "uint32", "Q": "uint64", "f": "float32", "d": "float64"}
+
+SUFFIXES = (".npy",) + tuple(_RAW_FORMATS)
+"""extensions of the files `cfg://` references load as `BinaryArray`. A
+reference with one of them is only loaded as a file if it exists under
+`cfg_root`, and no key of the tree has the uri of the reference."""
+
+
+def is_sidecar(uri):
+    """Whether the `cfg://` reference `uri` may be a binary file, see `SUFFIXES`."""
+    return uri.endswith(SUFFIXES)
+
+
+def _read_npy_header(path):
+    """The struct format, shape and data offset of the `.npy` file at `path`."""
+    with open(path, "rb") as f:
+        prefix = f.read(10)
+        if prefix[:6] != _NPY_MAGIC:
+            raise ValueError(f"{path} is not a .npy file.")
+        if prefix[6] == 1:
+            n, = struct.unpack("<H", prefix[8:10])
+            offset = 10
+        else:
+            n, = struct.unpack("<I", prefix[8:10] + f.read(2))
+            offset = 12
+        header = ast.literal_eval(f.read(n).decode("latin1"))
+    descr = header["descr"]
+    native = "<" if sys.byteorder == "little" else ">"
+    if not isinstance(descr, str) or descr[0] not in (native, "|", "=") or descr[1:] not in _NPY_FORMATS:
+        raise ValueError(f"Unsupported dtype {descr!r} of {path}, expect a native-endian bool, integer or float type.")
+    if header["fortran_order"]:
+        raise ValueError(f"Unsupported fortran order of {path}.")
+    return _NPY_FORMATS[descr[1:]], tuple(header["shape"]), offset + n
+
+
+def _empty(shape):
+    return [_empty(shape[1:]) for _ in range(shape[0])] if len(shape) > 1 else []
+
+
+class BinaryArray:
+    """A read-only array of numbers in a binary file next to the json files
+    (a `.npy` file, or a raw little-endian buffer of one of the types in
+    `_RAW_FORMATS`, e.g., `weights.f32`), which a `cfg://` reference to the
+    file resolves to.
+
+    The file is mapped into memory when the values are first read. Parsing,
+    copying and pickling pass the array through as a reference to the file,
+    and `to_json()` writes its `uri`. `numpy.asarray(array)` is a read-only
+    view of the mapped file, without copy."""
+
+    __slots__ = ("uri", "path", "_format", "_shape", "_offset", "_mmap", "_view", "_items")
+
+    def __init__(self, uri, path) -> None:
+        self.uri = uri
+        """the `cfg://` reference of the file."""
+        self.path = path
+        """the absolute path of the file."""
+        self._format = None
+        self._shape = None
+        self._offset = None
+        self._mmap = None
+        self._view = None
+        """bytes of the array in the mapped file."""
+        self._items = None
+
+    def _header(self):
+        if self._format is None:
+            if self.path.endswith(".npy"):
+                self._format, self._shape, self._offset = _read_npy_header(self.path)
+            else:
+                self._format, self._offset = _RAW_FORMATS[osp.splitext(self.path)[1]], 0
+                size = struct.calcsize(self._format)
+                if sys.byteorder != "little" and size > 1:
+                    raise ValueError(f"Raw buffer {self.path} is little-endian.")
+                self._shape = (osp.getsize(self.path) // size,)
+
+    def _bytes(self):
+        if self._view is None:
+            self._header()
+            nbytes = self.nbytes
+            if nbytes:
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap)[self._offset:self._offset + nbytes]
+            else:
+                self._view = memoryview(b"")
+        return self._view
+
+    @property
+    def format(self):
+        """`struct` format character of the items."""
+        self._header()
+        return self._format
+
+    @property
+    def shape(self):
+        self._header()
+        return self._shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        n = struct.calcsize(self.format)
+        for d in self.shape:
+            n *= d
+        return n
+
+    def memoryview(self):
+        """A read-only `memoryview` of the items, shaped as the array (flat if it is empty)."""
+        if self._items is None:
+            view = self._bytes()
+            self._items = view.cast(self.format) if not len(view) and self.ndim else view.cast(self.format, self.shape)
+        return self._items
+
+    def tolist(self):
+        if not self.nbytes and self.ndim:
+            return _empty(self.shape)
+        view = self.memoryview()
+        return view.tolist() if self.ndim else view[()]
+
+    def __len__(self) -> int:
+        if not self.ndim:
+            raise TypeError("len() of a 0-d array.")
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        if not self.ndim:
+            raise IndexError("Too many indices for a 0-d array.")
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        index = int(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if self.ndim == 1:
+            return self.memoryview()[index]
+        # rows of multi-dimensional arrays are copied into lists.
+        row = self.nbytes // len(self)
+        if not row:
+            return _empty(self.shape[1:])
+        return self._bytes()[index * row:(index + 1) * row].cast(self.format, self.shape[1:]).tolist()
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __array__(self, dtype=None, copy=None):
+        import numpy
+        array = numpy.frombuffer(self._bytes(), dtype=_NUMPY_DTYPES[self.format]).reshape(self.shape)
+        return array if dtype is None else array.astype(dtype)
+
+    def __eq__(self, other):
+        if isinstance(other, BinaryArray):
+            return self.path == other.path or self.tolist() == other.tolist()
+        # not read for the strings and scalars it is compared to, e.g., by `undefined` checks.
+        if isinstance(other, str) or not isinstance(other, abc.Sequence):
+            return NotImplemented
+        return self.tolist() == other
+
+    __hash__ = None
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return BinaryArray, (self.uri, self.path)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self.uri!r})"
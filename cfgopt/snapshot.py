@@ -0,0 +1,332 @@
+import mmap
+import os
+import os.path as osp
+import pickle
+import struct
+import tempfile
+from collections import abc
+
+_MAGIC = b"CFGSNAP1"
+_HEADER = struct.Struct("<8sQ")
+_U32 = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_I64 = struct.Struct("<q")
+_F64 = struct.Struct("<d")
+
+_ATTACHED = {}
+"""snapshot files mapped by this process, by path."""
+
+
+def _default_dir():
+    # files in /dev/shm are kept in shared memory.
+    return "/dev/shm" if osp.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+
+class _Writer:
+    """Serializes a tree of dicts, lists and json scalars, children before
+    their parents. Nodes shared in the tree are written once, as well as
+    equal strings."""
+
+    def __init__(self) -> None:
+        self.buf = bytearray(_HEADER.size)
+        self.nodes = {}
+        self.strings = {}
+        self.keep = []
+        """nodes written, so that their ids stay unique."""
+
+    def _append(self, *chunks):
+        offset = len(self.buf)
+        for chunk in chunks:
+            self.buf += chunk
+        return offset
+
+    def write(self, data):
+        if isinstance(data, (dict, list)):
+            if id(data) in self.nodes:
+                return self.nodes[id(data)]
+            self.keep.append(data)
+            if isinstance(data, dict):
+                items = [(self.write_str(str(k)), self.write(v)) for k, v in data.items()]
+                offset = self._append(b"d", _U32.pack(len(items)), *(_U64.pack(k) + _U64.pack(v) for k, v in items))
+            else:
+                items = [self.write(v) for v in data]
+                offset = self._append(b"l", _U32.pack(len(items)), *(_U64.pack(v) for v in items))
+            self.nodes[id(data)] = offset
+            return offset
+        elif isinstance(data, str):
+            return self.write_str(data)
+        elif data is None:
+            return self._append(b"N")
+        elif data is True or data is False:
+            return self._append(b"T" if data else b"F")
+        elif isinstance(data, int) and -2**63 <= data < 2**63:
+            return self._append(b"i", _I64.pack(data))
+        elif isinstance(data, float):
+            return self._append(b"f", _F64.pack(data))
+        else:
+            blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            return self._append(b"p", _U32.pack(len(blob)), blob)
+
+    def write_str(self, data):
+        offset = self.strings.get(data)
+        if offset is None:
+            encoded = data.encode("utf-8", "surrogatepass")
+            offset = self.strings[data] = self._append(b"s", _U32.pack(len(encoded)), encoded)
+        return offset
+
+    def finish(self, root):
+        _HEADER.pack_into(self.buf, 0, _MAGIC, root)
+        return bytes(self.buf)
+
+
+class _SnapshotFile:
+    """A snapshot file mapped read-only into memory."""
+
+    def __init__(self, path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buf = memoryview(self.mmap)
+        magic, self.root = _HEADER.unpack_from(self.buf, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a config snapshot.")
+
+    @classmethod
+    def attach(cls, path):
+        snapshot_file = _ATTACHED.get(path)
+        if snapshot_file is None:
+            snapshot_file = _ATTACHED[path] = cls(path)
+        return snapshot_file
+
+    def close(self):
+        if _ATTACHED.get(self.path) is self:
+            del _ATTACHED[self.path]
+        self.buf.release()
+        self.mmap.close()
+
+    def read(self, offset, uri):
+        buf = self.buf
+        tag = buf[offset]
+        if tag == 0x64:  # d
+            return FrozenDict(self, offset, uri)
+        elif tag == 0x6c:  # l
+            return FrozenList(self, offset, uri)
+        elif tag == 0x73:  # s
+            n, = _U32.unpack_from(buf, offset + 1)
+            return str(buf[offset + 5:offset + 5 + n], "utf-8", "surrogatepass")
+        elif tag == 0x69:  # i
+            return _I64.unpack_from(buf, offset + 1)[0]
+        elif tag == 0x66:  # f
+            return _F64.unpack_from(buf, offset + 1)[0]
+        elif tag == 0x4e:  # N
+            return None
+        elif tag == 0x54:  # T
+            return True
+        elif tag == 0x46:  # F
+            return False
+        elif tag == 0x70:  # p
+            n, = _U32.unpack_from(buf, offset + 1)
+            return pickle.loads(buf[offset + 5:offset + 5 + n])
+        raise ValueError(f"Corrupted config snapshot {self.path} at {offset}.")
+
+
+def _address(data, uri):
+    from .parser import ConfigContainer
+    for key in ConfigContainer._split_uri(uri):
+        if not isinstance(data, _FrozenNode):
+            raise TypeError(f"Expect a dict or list, got {type(data)}.")
+        data = data._get(key)
+    return data
+
+
+class _FrozenNode:
+    """A read-only view of a dict or list in a snapshot. Pickling it only
+    sends the path of the snapshot file and the uri of the node."""
+
+    __slots__ = ("_file", "_offset", "uri")
+
+    def __init__(self, snapshot_file, offset, uri) -> None:
+        self._file = snapshot_file
+        self._offset = offset
+        self.uri = uri
+
+    def __reduce__(self):
+        return _attach_node, (self._file.path, self.uri)
+
+    def _child_uri(self, key):
+        return f"{self.uri}/{key}"
+
+    def to_python(self, memo=None):
+        """A mutable copy of the subtree, in which shared nodes stay shared."""
+        if memo is None:
+            memo = {}
+        copied = memo.get(self._offset)
+        if copied is None:
+            if isinstance(self, FrozenDict):
+                copied = memo[self._offset] = {}
+                for k, v in self.items():
+                    copied[k] = v.to_python(memo) if isinstance(v, _FrozenNode) else v
+            else:
+                copied = memo[self._offset] = []
+                for v in self:
+                    copied.append(v.to_python(memo) if isinstance(v, _FrozenNode) else v)
+        return copied
+
+    def __eq__(self, other):
+        if isinstance(other, _FrozenNode):
+            if self._file is other._file and self._offset == other._offset:
+                return True
+            other = other.to_python()
+        return self.to_python() == other
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self.uri!r})"
+
+
+class FrozenDict(_FrozenNode, abc.Mapping):
+    """A read-only dict in a snapshot, also addressed by `cfg://` uris."""
+
+    __slots__ = ("_index",)
+
+    def __init__(self, snapshot_file, offset, uri) -> None:
+        super().__init__(snapshot_file, offset, uri)
+        self._index = None
+        """value offsets by key, built on first lookup."""
+
+    def _entries(self):
+        buf = self._file.buf
+        n, = _U32.unpack_from(buf, self._offset + 1)
+        start = self._offset + 5
+        for i in range(n):
+            key, value = struct.unpack_from("<QQ", buf, start + 16 * i)
+            yield self._file.read(key, None), value
+
+    def __len__(self) -> int:
+        return _U32.unpack_from(self._file.buf, self._offset + 1)[0]
+
+    def __iter__(self):
+        for key, _ in self._entries():
+            yield key
+
+    def items(self):
+        for key, value in self._entries():
+            yield key, self._file.read(value, self._child_uri(key))
+
+    def values(self):
+        for _, v in self.items():
+            yield v
+
+    def _get(self, key):
+        if self._index is None:
+            self._index = dict(self._entries())
+        return self._file.read(self._index[key], self._child_uri(key))
+
+    def __getitem__(self, uri):
+        if isinstance(uri, str) and "/" in uri:
+            return _address(self, uri)
+        return self._get(uri)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+            return True
+        except (KeyError, IndexError, ValueError, TypeError):
+            return False
+
+
+class FrozenList(_FrozenNode, abc.Sequence):
+    """A read-only list in a snapshot."""
+
+    __slots__ = ()
+
+    def __len__(self) -> int:
+        return _U32.unpack_from(self._file.buf, self._offset + 1)[0]
+
+    def _get(self, index):
+        return self[index]
+
+    def __getitem__(self, index):
+        n = len(self)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(n))]
+        index = int(index)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError(index)
+        offset, = _U64.unpack_from(self._file.buf, self._offset + 5 + 8 * index)
+        return self._file.read(offset, self._child_uri(index))
+
+
+def _attach_node(path, uri):
+    snapshot_file = _SnapshotFile.attach(path)
+    root = snapshot_file.read(snapshot_file.root, "cfg:/")
+    return root if uri == "cfg:/" else _address(root, uri)
+
+
+class ConfigSnapshot:
+    """An immutable, compact copy of a config tree in a file mapped into
+    memory, which other processes attach to without copying it.
+
+    Created by `ConfigContainer.freeze()`. Addressing it returns json scalars
+    or read-only `FrozenDict`/`FrozenList` views, and pickling it or its views
+    (e.g., to send them to `multiprocessing` workers) only sends the path of
+    the file and the uri of the node. By default the file is created in
+    `/dev/shm` (shared memory) if available. The creator removes the file by
+    `unlink()` (or leaving a `with` block), once no process attaches to it."""
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self._file = _SnapshotFile.attach(path)
+        self.root = self._file.read(self._file.root, "cfg:/")
+
+    @classmethod
+    def create(cls, data, path=None):
+        """Write the tree `data` (a dict or a list) into a new snapshot file."""
+        writer = _Writer()
+        content = writer.finish(writer.write(data))
+        if path is None:
+            fd, path = tempfile.mkstemp(prefix="cfgopt-", suffix=".snapshot", dir=_default_dir())
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+        else:
+            tmp_file = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(content)
+            os.replace(tmp_file, path)
+        return cls(path)
+
+    @property
+    def nbytes(self):
+        return len(self._file.buf)
+
+    def __getitem__(self, uri):
+        return _address(self.root, uri)
+
+    def container(self, uri=None):
+        """A mutable `ConfigContainer` copy of the subtree at `uri`, e.g., to call builders."""
+        from .parser import ConfigContainer
+        data = self.root if uri is None else self[uri]
+        return ConfigContainer(data.to_python() if isinstance(data, _FrozenNode) else data)
+
+    def __reduce__(self):
+        return ConfigSnapshot, (self.path,)
+
+    def close(self):
+        self._file.close()
+
+    def unlink(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unlink()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__qualname__}({self.path!r})"
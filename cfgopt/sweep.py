@@ -0,0 +1,126 @@
+"""Run a recipe for every point of a sweep, in forked workers sharing the
+parsed configs and the modules imported by parsing.
+
+    cfgoptrun recipes.json/train --sweep '{"lr": [0.1, 0.01], "model/depth": [18, 50]}' --jobs 4
+"""
+import itertools
+import json
+import os
+import os.path as osp
+import shlex
+import signal
+import sys
+import time
+import traceback
+
+
+def _to_args(overrides):
+    """Command line args of one point, given as a dict of uri to value or a list of args."""
+    if isinstance(overrides, dict):
+        return [f"--{uri}={json.dumps(value)}" for uri, value in overrides.items()]
+    elif isinstance(overrides, str):
+        return shlex.split(overrides)
+    return list(overrides)
+
+
+def load_sweep(spec):
+    """Lists of command line args of the points of the sweep `spec`, json or
+    the path of a file. A json dict of uris to lists of values is the grid of
+    their combinations, and a json list gives the points one by one, each as
+    a dict of uris to values or a list of `--uri=json` args. A file which is
+    not json has the args of one point on each line."""
+    if osp.isfile(spec):
+        with open(spec) as f:
+            text = f.read()
+        try:
+            spec = json.loads(text)
+        except json.JSONDecodeError:
+            lines = [line.strip() for line in text.splitlines()]
+            return [_to_args(line) for line in lines if line and not line.startswith("#")]
+    else:
+        try:
+            spec = json.loads(spec)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"The sweep is neither a file nor json: {e}.") from None
+    if isinstance(spec, dict):
+        uris = list(spec)
+        values = [v if isinstance(v, list) else [v] for v in spec.values()]
+        return [_to_args(dict(zip(uris, point))) for point in itertools.product(*values)]
+    elif isinstance(spec, list):
+        return [_to_args(point) for point in spec]
+    raise ValueError(f"Expect a json dict or list as sweep, got {type(spec)}.")
+
+
+def _run(session, recipe, args, log_file):
+    """Body of a forked worker, never returns."""
+    code = 1
+    try:
+        fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.dup2(fd, 1)
+        os.dup2(fd, 2)
+        os.close(fd)
+        sys.stdout = open(1, "w", buffering=1, closefd=False)
+        sys.stderr = open(2, "w", buffering=1, closefd=False)
+        print(f"cfgoptrun: {recipe} {' '.join(args)}", file=sys.stderr, flush=True)
+        session.variant(args)[recipe](recursive=False)
+        code = 0
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else int(e.code is not None)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code)
+
+
+def run_sweep(session, recipe, arg_lists, jobs=None, log_dir="sweep"):
+    """Call `recipe` (a uri relative to the root of `session`, a
+    `ConfigSession` whose `args_root` is the recipe) once for every list of
+    command line args in `arg_lists`, each in a worker forked from this
+    process, at most `jobs` (the number of cpus by default) at a time.
+
+    The output of each run is written to `log_dir/run-<i>.log`, and a
+    summary of the runs to `log_dir/summary.json`. Returns the summary, a
+    list of dicts with the `args`, `log`, `exitcode` (negative if killed by
+    a signal) and `seconds` of each run."""
+    if not hasattr(os, "fork"):
+        raise OSError("Sweeps need os.fork(), which is not available on this platform.")
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    os.makedirs(log_dir, exist_ok=True)
+    session.variant([])  # observed uris of the tree are indexed once, before forking.
+    runs = [dict(args=list(args), log=osp.join(log_dir, f"run-{i}.log"), exitcode=None, seconds=None)
+            for i, args in enumerate(arg_lists)]
+    pending, running = list(reversed(range(len(runs)))), {}
+    try:
+        while len(pending) or len(running):
+            while len(pending) and len(running) < jobs:
+                i = pending.pop()
+                sys.stdout.flush()
+                sys.stderr.flush()
+                pid = os.fork()
+                if pid == 0:
+                    _run(session, recipe, runs[i]["args"], runs[i]["log"])
+                running[pid] = i, time.perf_counter()
+            pid, status = os.waitpid(-1, 0)
+            if pid not in running:
+                continue
+            i, start = running.pop(pid)
+            exitcode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+            runs[i].update(exitcode=exitcode, seconds=time.perf_counter() - start)
+            print(f"cfgoptrun: run {i} exited with {runs[i]['exitcode']} after {runs[i]['seconds']:.1f}s, "
+                  f"see {runs[i]['log']}", file=sys.stderr)
+    finally:
+        # interrupted: stop the running workers, as a shell loop would.
+        for pid in running:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in running:
+            os.waitpid(pid, 0)
+        with open(osp.join(log_dir, "summary.json"), "w") as f:
+            json.dump(runs, f, indent=4)
+    return runs
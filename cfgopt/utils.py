@@ -2,6 +2,8 @@ import inspect
 import os
 import sys
 
+__version__ = "0.9.0"
+
 PARSE_ROOT = [None]
 
 def root(relpath, chdir=True):
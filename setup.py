@@ -6,7 +6,7 @@ this_directory = Path(__file__).parent
 long_description = (this_directory / "README.md").read_text()
 
 setup(name='cfgopt',
-      version='0.8.0',
+      version='0.9.0',
       description='You only configure your deep learning experiment once with cfgopt.',
       url='http://github.com/tjyuyao/cfgopt',
       author='Yuyao Huang',
@@ -14,11 +14,11 @@ setup(name='cfgopt',
       license='MIT',
       packages=['cfgopt'],
       entry_points={
-          'console_scripts': ['cfgoptrun=cfgopt.main:main'],
+          'console_scripts': ['cfgoptrun=cfgopt.main:main', 'cfgopt-server=cfgopt.server:main'],
+      },
+      extras_require={
+          'orjson': ['orjson'],
       },
-      install_requires=[
-          'jsbeautifier',
-      ],
       long_description=long_description,
       long_description_content_type='text/markdown',
       zip_safe=False)
@@ -0,0 +1,61 @@
+import copy
+import json
+import pickle
+
+import pytest
+
+import cfgopt
+from cfgopt.parser import URINotFoundError
+
+
+class Detector:
+    def __init__(self, anchors, num_classes) -> None:
+        self.anchors = anchors
+        self.num_classes = num_classes
+
+
+def test_binary_sidecar():
+    cfg = cfgopt.parse_configs('test_binary_sidecar/cfg', args=[])
+    anchors = cfg["model.json/head/anchors"]
+    assert isinstance(anchors, cfgopt.BinaryArray)
+    assert anchors.shape == (3, 2) and anchors.format == "f"
+    assert anchors[1] == [16., 30.] and anchors[-1] == [33., 23.]
+    assert anchors.tolist() == [[10., 13.], [16., 30.], [33., 23.]]
+    weights = cfg["model.json/head/class_weights"]
+    assert len(weights) == 4 and list(weights) == [0.5, 1., 2., 4.]
+    assert weights.memoryview()[3] == 4.
+
+    # inheritance, copies and pickles pass the arrays through.
+    assert cfg["model.json/small_head/anchors"] is anchors
+    assert copy.deepcopy(anchors) is anchors
+    assert pickle.loads(pickle.dumps(anchors)) == anchors
+    assert json.loads(cfg["model.json/head"].to_json()) == {
+        "anchors": "cfg://data/anchors.npy", "class_weights": "cfg://data/weights.f64"}
+
+
+def test_keys_with_suffixes():
+    # keys win over files, even if the file exists.
+    cfg = cfgopt.parse_configs('test_binary_sidecar/cfg', args=[])
+    assert cfg["model.json/tables/anchors"] == [[1, 2]]
+    assert cfg["model.json/tables/weights"] == [3, 4]
+    with pytest.raises(URINotFoundError):
+        cfgopt.parse_configs({"model.json": {"weights": "cfg://data/missing.f32"}}, args=[])
+
+
+def test_parse_cache(tmp_path):
+    cache_file = str(tmp_path / "cache")
+    cfgopt.parse_configs('test_binary_sidecar/cfg', args=[], cache_file=cache_file)
+    cfg = cfgopt.parse_configs('test_binary_sidecar/cfg', args=[], cache_file=cache_file)
+    assert cfg["model.json/small_head/class_weights"][0] == 0.5
+
+
+def test_builder_arguments():
+    # checking the arguments of a builder for undefined ones does not read the arrays.
+    cfg = cfgopt.parse_configs('test_binary_sidecar/cfg', args=[])
+    anchors = cfg["model.json/detector/anchors"]
+    partial = cfg["model.json/detector"]()
+    assert isinstance(partial, cfgopt.ConfigContainer)
+    detector = partial(num_classes=3)
+    assert detector.anchors is anchors and detector.num_classes == 3
+    assert anchors != "cfg://data/anchors.npy" and anchors != 1.
+    assert anchors._view is None
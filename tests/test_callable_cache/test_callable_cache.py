@@ -0,0 +1,30 @@
+import cfgopt
+
+
+class Norm:
+
+    def __init__(self, channels, momentum=0.2) -> None:
+        self.channels = channels
+        self.momentum = momentum
+
+
+def test_callable_cache():
+    cfgopt.callable_cache.invalidate()
+    # the counters are global, and counted from here.
+    before = cfgopt.callable_cache.stats()
+    cfg = cfgopt.parse_configs(cfg_root='test_callable_cache/cfg', args=[])
+
+    stats = {k: v - before[k] for k, v in cfgopt.callable_cache.stats().items()}
+    assert stats["callable_misses"] == 1 and stats["parameter_misses"] == 1
+
+    norms = [cfg["layers.json/norm"](channels) for channels in range(100)]
+    assert [norm.channels for norm in norms] == list(range(100))
+    assert norms[0].momentum == 0.1
+
+    stats = {k: v - before[k] for k, v in cfgopt.callable_cache.stats().items()}
+    assert stats["callable_misses"] == 1 and stats["callable_hits"] == 100
+    assert stats["parameter_misses"] == 1 and stats["parameter_hits"] == 100
+
+    cfgopt.callable_cache.invalidate("test_callable_cache.test_callable_cache")
+    assert cfgopt.callable_cache.stats()["callables"] == 0
+    assert cfg["layers.json/norm"](channels=3).channels == 3
@@ -0,0 +1,63 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import cfgopt
+import pytest
+
+barrier = threading.Barrier(2, timeout=5)
+
+
+class Tokenizer:
+
+    def __init__(self, vocab) -> None:
+        self.vocab = vocab
+        self.thread = threading.get_ident()
+
+
+class Dataset:
+
+    def __init__(self, name, tokenizer, wait=False) -> None:
+        if name.startswith("broken"):
+            raise RuntimeError(f"cannot load {name}")
+        if wait:
+            barrier.wait()  # only passes if both datasets are constructed at the same time.
+        self.name = name
+        self.tokenizer = tokenizer
+
+
+class Loader:
+
+    def __init__(self, datasets) -> None:
+        self.datasets = datasets
+
+
+def test_concurrent_instantiation():
+    loader = cfgopt.parse_configs(cfg_root='test_concurrent_instantiation/cfg', args=[])["data.json/loader"]
+    expected = loader()
+
+    with ProcessPoolExecutor(2) as pool:
+        for executor in (2, pool):
+            result = loader(executor=executor)
+            assert [d.name for d in result.datasets] == [d.name for d in expected.datasets]
+            assert [d.tokenizer.vocab for d in result.datasets] == [100, 100]
+            # every occurence of a builder is instantiated, as sequentially.
+            assert result.datasets[0].tokenizer is not result.datasets[1].tokenizer
+
+    result = cfgopt.ConfigContainer({
+        "__module__": loader["__module__"], "__class__": "Loader",
+        "datasets": [dict(d, wait=True) for d in loader["datasets"]],
+    })(executor=2)
+    assert [d.name for d in result.datasets] == ["train", "val"]
+
+
+def test_concurrent_instantiation_error():
+    loader = cfgopt.parse_configs(cfg_root='test_concurrent_instantiation/cfg', args=[
+        '--data.json/loader/datasets/0/name="broken0"',
+        '--data.json/loader/datasets/1/name="broken1"',
+    ])["data.json/loader"]
+    for executor in (2, 2, None):
+        with pytest.raises(RuntimeError, match="cannot load broken0") as e:
+            loader(executor=executor)
+        # the same origin, whether instantiated concurrently or not.
+        assert str(e.value).endswith("Config origin: 'cfg://data.json/loader/datasets/0'") or \
+            e.value.__notes__ == ["Config origin: 'cfg://data.json/loader/datasets/0'"]
@@ -0,0 +1,78 @@
+import os.path as osp
+import shutil
+import socket
+import threading
+import time
+
+import pytest
+import cfgopt
+from cfgopt.parser import ConfigParseError, URINotFoundError
+from cfgopt.server import ConfigServer, request_configs
+
+
+@pytest.fixture
+def server(tmp_path):
+    cfg_root = osp.join(tmp_path, "cfg")
+    shutil.copytree("test_config_server/cfg", cfg_root)
+    server = ConfigServer(cfg_root, socket_path=osp.join(tmp_path, "cfgopt.sock"), interval=0.05)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    while not osp.exists(server.socket_path):
+        time.sleep(0.01)
+    yield server
+    server.shutdown()
+    thread.join()
+
+
+def test_config_server(server):
+    args = ["--model/depth=101", "--epochs=120"]
+    cfg = cfgopt.parse_configs(server.cfg_root, args=args, args_root="recipes.json/train", server=server.socket_path)
+    local = cfgopt.parse_configs(server.cfg_root, args=args, args_root="recipes.json/train")
+    assert cfg["recipes.json/train"] == local["recipes.json/train"]
+    assert cfg["recipes.json/train/model/depth"] == 101
+    assert list(cfg) == ["recipes.json"]
+    # the served tree is left as it was.
+    assert request_configs(server.cfg_root, [], socket_path=server.socket_path)["models.json/resnet/depth"] == 50
+
+    with pytest.raises(URINotFoundError):
+        request_configs(server.cfg_root, [], "recipes.json/test", socket_path=server.socket_path)
+    with pytest.raises(ConfigParseError):
+        request_configs(server.cfg_root, ["--missing=1"], "recipes.json/train", socket_path=server.socket_path)
+    with pytest.raises(ConfigParseError):
+        request_configs("test_config_server/cfg", [], socket_path=server.socket_path)
+
+
+def test_reload(server):
+    with open(osp.join(server.cfg_root, "models.json"), "w") as f:
+        f.write('{"resnet": {"depth": 18, "width": 32, "norm": {"momentum": 0.1}}}')
+    deadline = time.time() + 10
+    while request_configs(server.cfg_root, [], "recipes.json/train", socket_path=server.socket_path)["recipes.json/train/model/depth"] != 18:
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+
+def test_fallback(tmp_path):
+    socket_path = osp.join(tmp_path, "none.sock")
+    assert request_configs("test_config_server/cfg", [], socket_path=socket_path) is None
+    cfg = cfgopt.parse_configs("test_config_server/cfg", args=[], server=socket_path)
+    assert cfg["recipes.json/train/model/width"] == 64
+    assert "models.json" in cfg
+
+
+def test_untrusted_server(server, monkeypatch):
+    # a server run by another user is never sent requests, nor unpickled.
+    monkeypatch.setattr("cfgopt.server.os.getuid", lambda: -1)
+    with pytest.raises(PermissionError):
+        request_configs(server.cfg_root, [], socket_path=server.socket_path)
+
+
+def test_timeout(tmp_path):
+    # a server which never answers.
+    socket_path = osp.join(tmp_path, "dead.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen()
+    try:
+        assert request_configs("test_config_server/cfg", [], socket_path=socket_path, timeout=0.1) is None
+    finally:
+        listener.close()
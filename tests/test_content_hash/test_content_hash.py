@@ -0,0 +1,62 @@
+
+import cfgopt
+
+
+def test_content_hash():
+    cfg = cfgopt.parse_configs('test_content_hash/cfg', args=[])
+    # equal subtrees have equal hashes, whatever the order of keys.
+    assert cfg.content_hash("recipes.json/a") == cfg.content_hash("recipes.json/b")
+    assert cfg.content_hash("recipes.json/a/steps") == cfg["recipes.json/b"].content_hash("steps")
+    assert cfg.content_hash("recipes.json/a") != cfg.content_hash("models.json/detector")
+    again = cfgopt.parse_configs('test_content_hash/cfg', args=[])
+    assert again.content_hash() == cfg.content_hash()
+
+
+def test_updated_path():
+    cfg = cfgopt.parse_configs('test_content_hash/cfg', args=[])
+    norm = cfg["models.json/classifier/backbone/norm"]  # addressed before hashing.
+    before = {uri: cfg.content_hash(uri) for uri in ("", "recipes.json/a", "models.json/classifier", "models.json/detector/anchors")}
+    hashes = cfg._hashes
+    n = len(hashes)
+
+    # the backbone is referenced from the detector, the classifier and the recipes.
+    norm["momentum"] = 0.01
+    # the norm, the backbone, the two models, the two recipes, the two files and the root.
+    assert len(hashes) == n - 9
+    for uri in ("", "recipes.json/a", "models.json/classifier"):
+        assert cfg.content_hash(uri) != before[uri]
+    assert cfg.content_hash("models.json/detector/anchors") == before["models.json/detector/anchors"]
+    assert cfg.content_hash("recipes.json/a") == cfg.content_hash("recipes.json/b")
+
+    cfg["models.json/backbone/norm/momentum"] = 0.1
+    assert cfg.content_hash() == before[""]
+
+
+def test_sub_container():
+    # a container hashed before the root is invalidated by values set from the root.
+    cfg = cfgopt.parse_configs('test_content_hash/cfg', args=[])
+    recipe = cfg["recipes.json/a"]
+    before = recipe.content_hash()
+    cfg["recipes.json/a/lr"] = 0.2
+    assert recipe.content_hash() != before
+    cfg["recipes.json/a/lr"] = 0.1
+    assert recipe.content_hash() == before
+    # and by values set from other containers.
+    cfg["models.json/backbone"]["norm/momentum"] = 0.01
+    assert recipe.content_hash() != before
+
+
+def test_command_line_update():
+    args = ["--recipes.json/a/lr=0.2"]
+    cfg = cfgopt.parse_configs('test_content_hash/cfg', args=args)
+    assert cfg.content_hash("recipes.json/a") != cfg.content_hash("recipes.json/b")
+    cfg["recipes.json/a/lr"] = 0.1
+    assert cfg.content_hash("recipes.json/a") == cfg.content_hash("recipes.json/b")
+
+
+def test_refresh():
+    cfg = cfgopt.parse_configs('test_content_hash/cfg', args=[])
+    before = cfg.content_hash("recipes.json/a")
+    cfg.data["recipes.json"]["a"]["steps"].append(300)  # bypasses the cache.
+    assert cfg.content_hash("recipes.json/a") == before
+    assert cfg.content_hash("recipes.json/a", refresh=True) != before
@@ -0,0 +1,42 @@
+import cfgopt
+
+
+class Norm:
+
+    def __init__(self, momentum) -> None:
+        self.momentum = momentum
+
+
+class Conv:
+
+    def __init__(self, in_channels, out_channels, anchors, norm) -> None:
+        self.in_channels = in_channels
+        self.out_channels = out_channels
+        self.anchors = anchors
+        self.norm = norm
+
+
+def test_copy_on_write():
+    conv = cfgopt.parse_configs(cfg_root='test_copy_on_write/cfg', args=[])["layers.json/conv"]
+    base = conv.data
+    anchors = base["anchors"]
+
+    # partial application returns a new builder sharing unchanged values.
+    conv3 = conv(in_channels=3)
+    assert isinstance(conv3, cfgopt.ConfigContainer)
+    assert conv3["in_channels"] == 3
+    assert conv3.data["anchors"] is anchors
+    assert base["in_channels"] == cfgopt.undefined
+
+    layers = [conv3(out_channels=c) for c in (16, 32)]
+    assert [layer.out_channels for layer in layers] == [16, 32]
+    assert isinstance(layers[0].norm, Norm) and layers[0].norm is not layers[1].norm
+    # the builders are left untouched.
+    assert conv3["out_channels"] == cfgopt.undefined
+    assert base["norm"]["__class__"] == "Norm"
+
+
+def test_partial_class():
+    norm = cfgopt.PartialClass(Norm)
+    assert norm(momentum=0.5).momentum == 0.5
+    assert norm["momentum"] == cfgopt.undefined
@@ -0,0 +1,60 @@
+import os
+import sys
+
+import cfgopt
+import pytest
+from cfgopt.parser import ConfigParseError
+
+MODELS = "test_deferred_imports.zoo.models"
+
+
+def test_deferred_imports(tmp_path):
+    cfgopt.callable_cache.invalidate()
+    sys.modules.pop(MODELS, None)
+    cfg = cfgopt.parse_configs(cfg_root='test_deferred_imports/cfg', args=[], defer_imports=True)
+    assert MODELS not in sys.modules
+
+    # omitted required parameters are filled when a builder is accessed.
+    model = cfg["recipes.json/train/model"]
+    assert MODELS in sys.modules
+    assert model["depth"] == cfgopt.undefined
+    assert isinstance(model(), cfgopt.ConfigContainer)
+    assert model(depth=18).depth == 18
+
+    # broken modules are only reported when called, and only imported once by addressing.
+    misses = cfgopt.callable_cache.callable_misses
+    cfg["recipes.json/missing"]
+    cfg["recipes.json"]._children.clear()
+    cfg["recipes.json/missing"]
+    assert cfgopt.callable_cache.callable_misses == misses + 1
+    with pytest.raises(ConfigParseError, match="Trying to import 'test_deferred_imports.zoo.missing'"):
+        cfg["recipes.json/missing"]()
+
+
+def test_wrap_without_deferred_imports():
+    # builders of trees which are not deferred are not imported by addressing them.
+    cfgopt.callable_cache.invalidate()
+    misses = cfgopt.callable_cache.callable_misses
+    cfg = cfgopt.ConfigContainer({"model": {"__module__": MODELS, "__class__": "Model"}})
+    assert "depth" not in cfg["model"]
+    assert cfgopt.callable_cache.callable_misses == misses
+
+
+def test_signature_table(tmp_path):
+    cache_file = str(tmp_path / "cache")
+    cfgopt.callable_cache.invalidate()
+    cfg = cfgopt.parse_configs(cfg_root='test_deferred_imports/cfg', args=[], defer_imports=True, cache_file=cache_file)
+    assert cfg["recipes.json/train/model/depth"] == cfgopt.undefined
+
+    # signatures looked up after parsing are persisted by the next parse (or at exit).
+    cfgopt.parse_configs(cfg_root='test_deferred_imports/cfg', args=[], defer_imports=True, cache_file=cache_file)
+    mtime = os.stat(f"{cache_file}.signatures").st_mtime_ns
+    cfgopt.parse_configs(cfg_root='test_deferred_imports/cfg', args=[], defer_imports=True, cache_file=cache_file)
+    assert os.stat(f"{cache_file}.signatures").st_mtime_ns == mtime
+
+    # a new process reads the signatures from the table, without importing.
+    cfgopt.callable_cache.invalidate()
+    sys.modules.pop(MODELS, None)
+    cfg = cfgopt.parse_configs(cfg_root='test_deferred_imports/cfg', args=[], defer_imports=True, cache_file=cache_file)
+    assert cfg["recipes.json/train/model"].data["depth"] == cfgopt.undefined
+    assert MODELS not in sys.modules
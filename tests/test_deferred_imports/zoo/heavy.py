@@ -0,0 +1 @@
+raise ImportError("the heavy module should not be imported")
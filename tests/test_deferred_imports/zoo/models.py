@@ -0,0 +1,5 @@
+class Model:
+
+    def __init__(self, depth, width=64) -> None:
+        self.depth = depth
+        self.width = width
@@ -0,0 +1,41 @@
+import json
+
+import cfgopt
+import pytest
+from cfgopt.parser import ConfigParseError
+
+
+def write_cfg_dir(cfg_root, n):
+    for i in range(n):
+        (cfg_root / f"sub{i % 3}").mkdir(exist_ok=True)
+        (cfg_root / f"sub{i % 3}" / f"cfg{i}.json").write_text(json.dumps({"i": i, "prev": f"cfg://sub{(i - 1) % 3}/cfg{i - 1}.json/i" if i else 0}))
+    (cfg_root / "empty.json").write_text("")
+    (cfg_root / "nan.json").write_text('{"x": NaN}')
+
+
+def test_file_loading(tmp_path):
+    write_cfg_dir(tmp_path, 20)
+    decoded = []
+    def decoder(content):
+        decoded.append(content)
+        return json.loads(content)
+
+    sequential = cfgopt.parse_configs(cfg_root=str(tmp_path), args=[], max_workers=1)
+    concurrent = cfgopt.parse_configs(cfg_root=str(tmp_path), args=[], max_workers=4, decoder=decoder)
+    assert list(sequential.keys()) == list(concurrent.keys())
+    assert sequential == cfgopt.parse_configs(cfg_root=str(tmp_path), args=[]) == concurrent
+    assert concurrent["sub1/cfg19.json/prev"] == 18
+    assert concurrent["empty.json"] == {}
+    assert len(decoded) == 21
+
+
+@pytest.mark.parametrize("decoder", [None, json.loads])
+def test_file_loading_errors(tmp_path, decoder):
+    write_cfg_dir(tmp_path, 4)
+    (tmp_path / "broken.json").write_text('{"x": 1,}')
+    with pytest.raises(ConfigParseError) as e:
+        cfgopt.parse_configs(cfg_root=str(tmp_path), args=[], decoder=decoder)
+    try:
+        json.loads('{"x": 1,}')
+    except json.JSONDecodeError as json_error:
+        assert str(e.value) == f"While parsing {tmp_path / 'broken.json'}, {json_error}."
@@ -0,0 +1,73 @@
+import json
+import os
+
+import cfgopt
+import pytest
+from cfgopt.parser import URINotFoundError
+
+
+def write(path, data):
+    path.write_text(json.dumps(data))
+    # make sure the modification is visible to mtime polling.
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def cfg_root(tmp_path):
+    write(tmp_path / "layers.json", {"norm": {"momentum": 0.1}, "act": "relu"})
+    write(tmp_path / "models.json", {
+        "base": {"norm": "cfg://layers.json/norm", "depth": 18},
+        "model": {"__base__": "cfg://models.json/base", "depth": 50, "head": "cfg://../base/depth"},
+    })
+    write(tmp_path / "datasets.json", {"train": {"batch_size": 8}})
+    return tmp_path
+
+
+def test_incremental_reparse(cfg_root):
+    session = cfgopt.ConfigSession(str(cfg_root), args=["--models.json/model/depth=101"])
+    root = session.root
+    model = root["models.json/model"]
+    datasets = root["datasets.json"].data
+    assert model["depth"] == 101
+    assert model["head"] == 18
+    assert session.poll() == []
+
+    write(cfg_root / "layers.json", {"norm": {"momentum": 0.01}, "act": "relu"})
+    changed = session.poll()
+    assert sorted(changed) == [
+        "cfg://layers.json/norm/momentum",
+        "cfg://models.json/base/norm/momentum",
+        "cfg://models.json/model/norm/momentum",
+    ]
+    # command line updates still apply.
+    model = root["models.json/model"]
+    assert model["norm/momentum"] == 0.01
+    assert model["depth"] == 101
+    assert root["models.json/base/norm"].data is root["layers.json/norm"].data
+    # files that do not depend on the modified one are left untouched.
+    assert root["datasets.json"].data is datasets
+
+    write(cfg_root / "models.json", {"base": {"norm": "cfg://layers.json/norm", "depth": 34}, "model": {"__base__": "cfg://models.json/base"}})
+    assert session.reload(["models.json"]) == ["cfg://models.json/base/depth", "cfg://models.json/model/head"]
+    assert root["models.json/model/depth"] == 101
+
+    write(cfg_root / "extra.json", {"x": 1})
+    assert session.poll() == ["cfg://extra.json"]
+    os.remove(cfg_root / "extra.json")
+    assert session.poll() == ["cfg://extra.json"]
+    assert "extra.json" not in root.data
+
+
+def test_failed_reparse(cfg_root):
+    session = cfgopt.ConfigSession(str(cfg_root), args=[])
+    write(cfg_root / "layers.json", {"act": "relu"})
+    with pytest.raises(URINotFoundError):
+        session.poll()
+    # the tree is left as it was before the reload.
+    assert session.root["models.json/model/norm/momentum"] == 0.1
+    assert session.root["layers.json/norm/momentum"] == 0.1
+    # the failed files are loaded again by the next poll.
+    write(cfg_root / "layers.json", {"norm": {"momentum": 0.2}})
+    assert "cfg://layers.json/act" in session.poll()
+    assert session.root["models.json/model/norm/momentum"] == 0.2
@@ -0,0 +1,44 @@
+import cfgopt
+import pytest
+from cfgopt.parser import ConfigParseError
+
+
+class Norm:
+
+    def __init__(self, momentum) -> None:
+        self.momentum = momentum
+
+
+class Block:
+
+    def __init__(self, in_channels, out_channels, norms, options, norm_type, stride=1) -> None:
+        self.in_channels = in_channels
+        self.out_channels = out_channels
+        self.norms = norms
+        self.options = options
+        self.norm_type = norm_type
+        self.stride = stride
+
+
+def test_instantiation_plan():
+    block = cfgopt.parse_configs(cfg_root='test_instantiation_plan/cfg', args=[])["layers.json/block"]
+    plan = block.compile()
+
+    for layer in (plan(16, out_channels=32), block(16, out_channels=32)):
+        assert (layer.in_channels, layer.out_channels, layer.stride) == (16, 32, 1)
+        assert [type(norm) for norm in layer.norms] == [Norm, Norm]
+        assert layer.options["act"] == "relu" and isinstance(layer.options["norm"], Norm)
+        assert isinstance(layer.norm_type, cfgopt.ConfigContainer)
+        assert layer.norm_type(momentum=0.5).momentum == 0.5
+
+    layers = [plan(in_channels=c, out_channels=c, stride=2) for c in (16, 32)]
+    assert [layer.in_channels for layer in layers] == [16, 32]
+    assert layers[0].norms[0] is not layers[1].norms[0]
+    assert plan(16, 32, options={"act": "gelu"}).options["act"] == "gelu"
+
+    # partial application and errors are handled by the builder.
+    assert isinstance(plan(in_channels=16), cfgopt.ConfigContainer)
+    with pytest.raises(ConfigParseError, match="Unsupported parameter 'channels'"):
+        plan(channels=16)
+    with pytest.raises(TypeError):
+        cfgopt.ConfigContainer({"a": 1}).compile()
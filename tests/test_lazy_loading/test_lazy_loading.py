@@ -0,0 +1,19 @@
+import cfgopt
+import pytest
+
+
+def test_lazy_loading():
+    cfg = cfgopt.parse_configs(cfg_root='test_lazy_loading/cfg', args=["--epochs=5"], args_root="recipes.json/train", lazy=True)
+
+    assert sorted(cfg.keys()) == ["layers.json", "models.json", "recipes.json"]
+    assert cfg["recipes.json/train/epochs"] == 5
+    assert cfg["recipes.json/train/model/depth"] == 50
+    assert cfg["recipes.json/train/model/norm/momentum"] == 0.1
+    assert cfg["recipes.json/train/model/head/classes"] == 10
+
+
+def test_lazy_loading_errors():
+    with pytest.raises(cfgopt.parser.ConfigParseError):
+        cfgopt.parse_configs(cfg_root='test_lazy_loading/cfg', args=[], args_root="recipes.json/broken", lazy=True)
+    with pytest.raises(cfgopt.parser.ConfigParseError):
+        cfgopt.parse_configs(cfg_root='test_lazy_loading/cfg', args=[])
@@ -0,0 +1,75 @@
+import pytest
+
+import cfgopt
+from cfgopt.parser import ConfigParseError
+
+
+def test_same_tree():
+    deepcopied = cfgopt.parse_configs('test_overlay_inheritance/cfg', args=[])
+    overlaid = cfgopt.parse_configs('test_overlay_inheritance/cfg', args=[], overlay=True)
+    assert overlaid == deepcopied
+    assert overlaid["models.json/tiny/backbone/norm/momentum"] == 0.01
+    assert overlaid["models.json/small/backbone/norm/momentum"] == 0.1
+    assert overlaid["models.json/base/backbone/stages"] == [3, 4, 6, 3]
+
+
+def test_references():
+    # values set through a reference are seen wherever it is referenced, but not by the dicts inheriting it.
+    trees = []
+    for overlay in (False, True):
+        cfg = cfgopt.parse_configs('test_overlay_inheritance/cfg', args=["--models.json/head/norm/momentum=0.5"], overlay=overlay)
+        assert cfg["layers.json/bn/momentum"] == cfg["models.json/head/norm/momentum"] == 0.5
+        assert cfg["models.json/finetune/norm/momentum"] == 0.1
+        cfg["layers.json/bn/momentum"] = 0.7
+        assert cfg["models.json/head/norm/momentum"] == 0.7
+        assert cfg["models.json/finetune/norm/momentum"] == 0.1
+        cfg["models.json/finetune/norm/momentum"] = 0.9
+        assert cfg["layers.json/bn/momentum"] == 0.7
+        # references stay aliased in the copies of an inheriting dict, and of the dicts inheriting it.
+        assert cfg["models.json/finetune/aux/norm/momentum"] == 0.9
+        assert cfg["models.json/distill/norm/momentum"] == cfg["models.json/distill/aux/norm/momentum"] == 0.1
+        cfg["models.json/distill/aux/norm/momentum"] = 0.3
+        assert cfg["models.json/distill/norm/momentum"] == 0.3
+        assert cfg["models.json/finetune/norm/momentum"] == 0.9
+        cfg["optim.json/sgd/schedule/1"] = 90
+        assert cfg["models.json/base/optimizer/schedule"] == [30, 90]
+        assert cfg["models.json/small/optimizer/schedule"] == [30, 60]
+        trees.append(cfg)
+    assert trees[0] == trees[1]
+
+
+def test_shared_until_written():
+    cfg = cfgopt.parse_configs('test_overlay_inheritance/cfg', args=[], overlay=True)
+    base, small, tiny = (cfg[f"models.json/{k}"].data for k in ("base", "small", "tiny"))
+    assert small["optimizer"] is base["optimizer"] is tiny["optimizer"]
+    # "a/b" keys copy the dicts on their path only.
+    assert small["backbone"] is not base["backbone"]
+    assert small["backbone"]["norm"] is base["backbone"]["norm"]
+    assert tiny["backbone"]["stages"] is small["backbone"]["stages"]
+    assert tiny["backbone"]["norm"] is not small["backbone"]["norm"]
+
+    cfg["models.json/small/optimizer/schedule/0"] = 10
+    assert small["optimizer"]["schedule"] == [10, 60]
+    assert base["optimizer"]["schedule"] == tiny["optimizer"]["schedule"] == [30, 60]
+    cfg["models.json/base/backbone/norm/momentum"] = 0.5
+    assert small["backbone"]["norm"]["momentum"] == 0.1
+    # the container of a shared node can not copy it into its parent.
+    with pytest.raises(ConfigParseError):
+        cfg["models.json/tiny/optimizer"]["lr"] = 1.
+
+
+def test_command_line_update():
+    args = ["--models.json/tiny/backbone/width=32", "--models.json/small/optimizer/lr=0.2"]
+    cfg = cfgopt.parse_configs('test_overlay_inheritance/cfg', args=args, overlay=True)
+    assert cfg["models.json/tiny/backbone/width"] == 32
+    assert cfg["models.json/small/backbone/width"] == cfg["models.json/base/backbone/width"] == 64
+    assert cfg["models.json/small/optimizer/lr"] == 0.2
+    assert cfg["models.json/tiny/optimizer/lr"] == cfg["optim.json/sgd/lr"] == 0.1
+
+
+def test_parse_cache(tmp_path):
+    cache_file = str(tmp_path / "cache")
+    for _ in range(2):
+        cfg = cfgopt.parse_configs('test_overlay_inheritance/cfg', args=[], cache_file=cache_file, overlay=True)
+        cfg["models.json/small/backbone/width"] = 16
+        assert cfg["models.json/base/backbone/width"] == cfg["models.json/tiny/backbone/width"] == 64
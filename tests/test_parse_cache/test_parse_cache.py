@@ -0,0 +1,43 @@
+import shutil
+
+import pytest
+
+import cfgopt
+from cfgopt import parser
+
+
+def test_parse_cache(tmp_path, monkeypatch):
+    cfg_root = tmp_path / "cfg"
+    shutil.copytree("test_parse_cache/cfg", cfg_root)
+    cache_file = str(tmp_path / "cfg.cache")
+
+    cold = cfgopt.parse_configs(cfg_root=str(cfg_root), args=[], cache_file=cache_file)
+    assert cold["recipes.json/train/model/depth"] == 50
+
+    # a warm launch does not read any json file.
+    load_cfg_file = parser._load_cfg_file
+    monkeypatch.setattr(parser, "_load_cfg_file", None)
+    warm = cfgopt.parse_configs(cfg_root=str(cfg_root), args=[], cache_file=cache_file)
+    assert warm == cold
+
+    # updates before expansion are resolved again from the cached raw tree.
+    warm = cfgopt.parse_configs(cfg_root=str(cfg_root), args=["--models.json/base/width=32"], cache_file=cache_file)
+    assert warm["recipes.json/train/model/width"] == 32
+    warm = cfgopt.parse_configs(cfg_root=str(cfg_root), args=["--epochs=5"], args_root="recipes.json/train", cache_file=cache_file)
+    assert warm["recipes.json/train/epochs"] == 5
+    assert warm["recipes.json/train/model/width"] == 64
+
+    # modified files invalidate the cache.
+    monkeypatch.setattr(parser, "_load_cfg_file", load_cfg_file)
+    (cfg_root / "recipes.json").write_text('{"train": {"model": "cfg://models.json/base"}}')
+    changed = cfgopt.parse_configs(cfg_root=str(cfg_root), args=[], cache_file=cache_file)
+    assert changed["recipes.json/train/model/depth"] == 18
+
+
+def test_unwritable_cache(tmp_path):
+    # the cache is only a speed-up, parsing does not fail without it.
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    with pytest.warns(RuntimeWarning, match="parse cache"):
+        cfg = cfgopt.parse_configs(cfg_root="test_parse_cache/cfg", args=[], cache_file=str(blocker / "cfg.cache"))
+    assert cfg["recipes.json/train/model/depth"] == 50
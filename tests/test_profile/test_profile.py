@@ -0,0 +1,30 @@
+import cfgopt
+
+
+class Norm:
+
+    def __init__(self, momentum, eps) -> None:
+        self.momentum = momentum
+
+
+def test_profile():
+    reports = []
+    profile = cfgopt.ParseProfile(hook=reports.append)
+    cfgopt.parse_configs(cfg_root='test_profile/cfg', args=["--models.json/model/channels=32", "--models.json/model/norm/eps=0.1"], profile=profile)
+    assert reports == [profile]
+
+    phases = profile.as_dict()["phases"]
+    assert list(phases) == ["load", "update before expansion", "resolve", "python objects", "update after expansion"]
+    assert phases["load"]["files"] == 1
+    assert phases["update before expansion"]["updates"] == 0
+    assert phases["update before expansion"]["deferred"] == 2
+    assert phases["resolve"]["references"] == 2
+    assert phases["resolve"]["reference_hits"] == 1
+    assert phases["resolve"]["inheritances"] == 1
+    assert phases["resolve"]["nested_keys"] == 1
+    assert phases["resolve"]["deepcopied_nodes"] == 2
+    assert phases["python objects"]["builders"] == 2
+    assert phases["update after expansion"]["updates"] == 2
+    assert list(profile.imports) == ["test_profile.test_profile"]
+    assert profile.seconds >= phases["resolve"]["seconds"] > 0
+    assert "resolve" in profile.report()
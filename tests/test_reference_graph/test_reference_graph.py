@@ -0,0 +1,31 @@
+import cfgopt
+import pytest
+from cfgopt.parser import ReferenceCycleError
+
+
+def test_reference_graph():
+    root = cfgopt.parse_configs(cfg_root='test_reference_graph/cfg', args=[])
+    cfg = root["models.json"]
+
+    assert cfg["model/repeats"] == 2
+    assert cfg["model/channels"] == 128
+    assert cfg["model/head_channels"] == 128
+    assert cfg["model/stem/channels"] == 64
+    # inherited fields are copies, while references are shared.
+    assert cfg["model/norm/momentum"] == 0.01
+    assert cfg["backbone/norm/momentum"] == 0.1
+    assert cfg["block/norm"].data is root["layers.json/bn"].data
+
+
+def test_reference_cycle():
+    with pytest.raises(ReferenceCycleError, match="cfg://a.json/x -> cfg://a.json/y -> cfg://a.json/x"):
+        cfgopt.parse_configs({"a.json": {"x": {"__base__": "cfg://a.json/y"}, "y": {"__base__": "cfg://a.json/x"}}}, args=[])
+
+
+def test_own_key_of_inheriting_dict():
+    # a base may reference an own key of the dict inheriting it.
+    cfg = cfgopt.parse_configs({"f.json": {
+        "defaults": {"lr": "cfg://f.json/exp/base_lr"},
+        "exp": {"__base__": "cfg://f.json/defaults", "base_lr": 0.1},
+    }}, args=[])
+    assert cfg["f.json/exp/lr"] == cfg["f.json/defaults/lr"] == 0.1
@@ -0,0 +1,81 @@
+import cfgopt
+
+
+class Dataset:
+
+    built = 0
+
+    def __init__(self, root) -> None:
+        Dataset.built += 1
+        self.root = root
+
+
+class Loader:
+
+    def __init__(self, dataset) -> None:
+        self.dataset = dataset
+
+
+class Recipe:
+
+    def __init__(self, trainer, sampler, evaluators) -> None:
+        self.trainer = trainer
+        self.sampler = sampler
+        self.evaluators = evaluators
+
+
+def _recipe(cfg, **kwds):
+    Dataset.built = 0
+    recipe = cfg["recipes.json/train"](**kwds)
+    return recipe, Dataset.built
+
+
+def test_shared_marker():
+    cfg = cfgopt.parse_configs('test_shared_instances/cfg', args=[])
+    recipe, built = _recipe(cfg)
+    # the marked train_set is built once, the val_set at every site.
+    assert built == 3
+    assert recipe.trainer.dataset is recipe.sampler.dataset
+    assert recipe.evaluators[0].dataset is not recipe.evaluators[1].dataset
+    # only within one call.
+    assert _recipe(cfg)[0].trainer.dataset is not recipe.trainer.dataset
+
+    for executor in (4, None):
+        recipe, built = _recipe(cfg, executor=executor, shared=True)
+        assert built == 2
+        assert recipe.evaluators[0].dataset is recipe.evaluators[1].dataset
+    plan = cfg["recipes.json/train"].compile()
+    Dataset.built = 0
+    recipe = plan()
+    assert Dataset.built == 3 and recipe.trainer.dataset is recipe.sampler.dataset
+
+
+def test_named_scope():
+    cfg = cfgopt.parse_configs('test_shared_instances/cfg', args=[])
+    cfgopt.release_shared("datasets")
+    first = cfg["recipes.json/cached"]()
+    assert cfg["recipes.json/cached"]().dataset is first.dataset
+    assert cfg["recipes.json/cached"].compile()().dataset is first.dataset
+    cfgopt.release_shared("datasets")
+    assert cfg["recipes.json/cached"]().dataset is not first.dataset
+
+    recipe, _ = _recipe(cfg, shared="run")
+    again, built = _recipe(cfg, shared="run")
+    assert built == 0 and again.trainer is recipe.trainer
+    cfgopt.release_shared()
+
+
+def test_named_scope_updates():
+    # an instance of a named scope is not returned once its builder is set.
+    cfg = cfgopt.parse_configs('test_shared_instances/cfg', args=[])
+    cfgopt.release_shared("datasets")
+    first = cfg["recipes.json/cached"]()
+    assert first.dataset.root == "cached"
+    cfg["data.json/cached_set/root"] = "changed"
+    second = cfg["recipes.json/cached"]()
+    assert second.dataset.root == "changed"
+    assert cfg["recipes.json/cached"]().dataset is second.dataset
+    assert cfg["recipes.json/cached"].compile()().dataset is second.dataset
+    cfg["data.json/cached_set/root"] = "cached"
+    assert cfg["recipes.json/cached"]().dataset.root == "cached"
+    cfgopt.release_shared()
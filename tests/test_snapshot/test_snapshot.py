@@ -0,0 +1,43 @@
+import multiprocessing
+import pickle
+
+import cfgopt
+from cfgopt.snapshot import FrozenDict, FrozenList
+
+
+def read_in_worker(node):
+    return node.uri, node["lr"], list(node["milestones"])
+
+
+def test_snapshot(tmp_path):
+    cfg = cfgopt.parse_configs({
+        "models.json": {"norm": {"momentum": 0.1, "eps": 1e-5}, "big": 2 ** 70, "flag": True, "none": None},
+        "recipes.json": {
+            "train": {"lr": 0.1, "milestones": [30, 60, 90], "norm": "cfg://models.json/norm", "name": "train"},
+        },
+    }, args=[])
+
+    with cfg.freeze(str(tmp_path / "cfg.snapshot")) as snapshot:
+        train = snapshot["recipes.json/train"]
+        assert isinstance(train, FrozenDict) and isinstance(train["milestones"], FrozenList)
+        assert train["lr"] == 0.1 and train["milestones"][-1] == 90 and train["name"] == "train"
+        assert snapshot["models.json/big"] == 2 ** 70
+        assert snapshot["models.json/flag"] is True and snapshot["models.json/none"] is None
+        assert snapshot["cfg://recipes.json/train/norm/momentum"] == 0.1
+        assert list(train) == ["lr", "milestones", "norm", "name"]
+        assert snapshot.root == cfg.data
+
+        # shared nodes are stored once, and stay shared in copies.
+        copied = snapshot.container().data
+        assert copied == cfg.data
+        assert copied["recipes.json"]["train"]["norm"] is copied["models.json"]["norm"]
+
+        # pickles only hold the file path and the uri.
+        data = pickle.dumps(train)
+        assert len(data) < 200 and b"milestones" not in data
+        assert pickle.loads(data)["milestones"] == [30, 60, 90]
+        assert pickle.loads(pickle.dumps(snapshot))["recipes.json/train/lr"] == 0.1
+
+        with multiprocessing.get_context("spawn").Pool(2) as pool:
+            results = pool.map(read_in_worker, [train, train])
+        assert results == [("cfg://recipes.json/train", 0.1, [30, 60, 90])] * 2
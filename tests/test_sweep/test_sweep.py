@@ -0,0 +1,39 @@
+import json
+import os
+import os.path as osp
+
+import cfgopt
+from cfgopt.sweep import load_sweep, run_sweep
+
+_PID = os.getpid()
+
+
+def train(lr, model):
+    print(f"lr={lr} depth={model['depth']} forked={os.getpid() != _PID}")
+    if model["depth"] > 50:
+        raise ValueError("too deep")
+
+
+def test_load_sweep(tmp_path):
+    grid = load_sweep('{"lr": [0.1, 0.01], "model/depth": [18, 50]}')
+    assert grid == [["--lr=0.1", "--model/depth=18"], ["--lr=0.1", "--model/depth=50"],
+                    ["--lr=0.01", "--model/depth=18"], ["--lr=0.01", "--model/depth=50"]]
+    assert load_sweep('[{"lr": 0.5}, ["--model/depth=34"]]') == [["--lr=0.5"], ["--model/depth=34"]]
+    lines = tmp_path / "sweep.txt"
+    lines.write_text("# lr and depth\n--lr=0.5 --model/depth=34\n\n--lr=1\n")
+    assert load_sweep(str(lines)) == [["--lr=0.5", "--model/depth=34"], ["--lr=1"]]
+
+
+def test_run_sweep(tmp_path):
+    session = cfgopt.ConfigSession('test_sweep/cfg', args=["--lr=0.2"], args_root="recipes.json/train")
+    arg_lists = load_sweep('{"model/depth": [18, 101, 50]}')
+    runs = run_sweep(session, "recipes.json/train", arg_lists, jobs=2, log_dir=str(tmp_path))
+    assert [run["exitcode"] for run in runs] == [0, 1, 0]
+    with open(runs[2]["log"]) as f:
+        assert "lr=0.2 depth=50 forked=True" in f.read()
+    with open(runs[1]["log"]) as f:
+        assert "ValueError: too deep" in f.read()
+    with open(osp.join(tmp_path, "summary.json")) as f:
+        assert json.load(f)[1]["args"] == ["--model/depth=101"]
+    # the session is left untouched.
+    assert session.root["recipes.json/train/model/depth"] == 18
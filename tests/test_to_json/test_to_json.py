@@ -0,0 +1,29 @@
+import io
+import json
+import os.path as osp
+
+import pytest
+import cfgopt
+
+
+def test_to_json(tmp_path):
+    cfg = cfgopt.parse_configs(cfg_root='test_to_json/cfg', args=["--data.json/model/depth=4"])
+    json_str = cfg["data.json"].to_json()
+    assert cfgopt.ConfigContainer(json.loads(json_str)) == cfg["data.json"]
+
+    json_file = osp.join(tmp_path, "data.json")
+    assert cfg["data.json"].to_json(json_file) == json_str
+    with open(json_file) as f:
+        assert f.read() == json_str
+
+    stream = io.StringIO()
+    assert cfg["data.json/model"].to_json(stream) is None
+    assert stream.getvalue() == cfg["data.json/model"].to_json()
+
+
+def test_to_json_format():
+    jsbeautifier = pytest.importorskip("jsbeautifier")
+    from cfgopt.parser import dewrap
+    cfg = cfgopt.parse_configs(cfg_root='test_to_json/cfg', args=[])
+    for uri in ["data.json", "data.json/base", "data.json/model", "data.json/empty"]:
+        assert cfg[uri].to_json() == jsbeautifier.beautify(json.dumps(dewrap(cfg[uri].data)))
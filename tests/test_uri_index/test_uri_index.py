@@ -0,0 +1,87 @@
+import pytest
+import cfgopt
+from cfgopt.index import ConfigIndex
+from cfgopt.parser import URINotFoundError
+
+
+def test_uri_index():
+    args = ["--models/resnet.json/large/optimizer/lr=0.02", "--recipes.json/train/model/optimizer/lr=0.2"]
+    cfg = cfgopt.parse_configs(cfg_root='test_uri_index/cfg', args=args, index=True)
+    assert cfg["models/resnet.json/large/optimizer/lr"] == 0.02
+    # updated after expansion, through the index.
+    assert cfg["recipes.json/train/model/optimizer/lr"] == 0.2
+    assert cfg.query("models/resnet.json/small/optimizer/lr") == {"models/resnet.json/small/optimizer/lr": 0.2}
+    assert cfg["cfg://models/vit.json/base/backbone/depth"] == 12
+    assert cfg["recipes.json/train/milestones/1"] == 60
+    assert cfg["models/resnet.json/small"] is cfg["models/resnet.json"]["small"]
+    assert "models/vit.json/base/backbone/heads" in cfg
+    assert "models/vit.json/base/backbone/width" not in cfg
+    assert "recipes.json/train/milestones/../epochs" in cfg
+    with pytest.raises(URINotFoundError):
+        cfg["models/vit.json/base/backbone/width"]
+
+    assert sorted(cfg.uris()) == ["models", "recipes.json"]
+    assert sorted(cfg.uris("models")) == ["models/resnet.json", "models/vit.json"]
+    assert cfg.uris("recipes.json/train/milestones") == ["recipes.json/train/milestones/0", "recipes.json/train/milestones/1"]
+    assert "models/vit.json/base/optimizer/lr" in cfg.uris("models/vit.json", recursive=True)
+
+    assert cfg.query("models/*.json/*/backbone/depth") == {
+        "models/resnet.json/small/backbone/depth": 18,
+        "models/resnet.json/large/backbone/depth": 101,
+        "models/vit.json/base/backbone/depth": 12,
+    }
+    assert set(cfg.query("**/optimizer/lr")) == {
+        "models/resnet.json/small/optimizer/lr",
+        "models/resnet.json/large/optimizer/lr",
+        "models/vit.json/base/optimizer/lr",
+        "recipes.json/train/model/optimizer/lr",
+    }
+    assert cfg.query("models/resnet.json/*/backbone")["models/resnet.json/small/backbone"] is cfg["models/resnet.json/small/backbone"]
+    assert cfg["models/vit.json/base/backbone"].query("*") == {"depth": 12, "heads": 12}
+
+
+def test_index_update():
+    cfg = cfgopt.parse_configs(cfg_root='test_uri_index/cfg', args=[], index=True)
+    cfg["models/resnet.json/small/backbone/depth"] = 34
+    assert cfg["models/resnet.json/small/backbone/depth"] == 34
+    # the same dict, referenced by the recipe.
+    assert cfg["recipes.json/train/model/backbone/depth"] == 34
+
+    cfg["models/resnet.json/small/backbone"] = {"depth": 50, "groups": 32}
+    assert cfg["models/resnet.json/small/backbone/groups"] == 32
+    assert "models/resnet.json/small/backbone/width" not in cfg
+    assert cfg["recipes.json/train/model/backbone/groups"] == 32
+
+    # through containers addressed from the indexed root, and new keys.
+    cfg["recipes.json/train"]["epochs"] = 120
+    cfg["recipes.json/train"]["warmup"] = 5
+    assert cfg["recipes.json/train/epochs"] == 120
+    assert cfg.query("recipes.json/train/warmup") == {"recipes.json/train/warmup": 5}
+    cfg["recipes.json/train/milestones/0"] = 40
+    assert cfg["recipes.json/train/milestones"] == [40, 60]
+
+    index = cfg.build_index()
+    assert len(index) == len(cfg.uris(recursive=True)) - 1  # without the "models" directory.
+
+
+def test_update_after_command_line():
+    # containers addressed by command-line updates, before indexing, update the index as well.
+    args = ["--models/resnet.json/small/backbone/depth=34", "--recipes.json/train/epochs=120"]
+    cfg = cfgopt.parse_configs(cfg_root='test_uri_index/cfg', args=args, index=True)
+    cfg["models/resnet.json"]["small"] = 77
+    cfg["recipes.json"]["train"]["milestones"] = {"first": 30}
+    assert cfg.uris("models/resnet.json/small") == []
+    assert "models/resnet.json/small/backbone/depth" not in cfg.query("models/resnet.json/**")
+    assert cfg["recipes.json/train/model/backbone/depth"] == 34
+    assert cfg.query("recipes.json/train/milestones/*") == {"recipes.json/train/milestones/first": 30}
+    assert cfg._index.nodes == ConfigIndex(cfg).nodes
+
+
+def test_literal_wildcards():
+    # wildcards are only matched by `query()`, keys containing them are addressed as usual.
+    cfg = cfgopt.parse_configs({"a.json": {"why?": 1, "*": 2}}, args=["--a.json/why?=3"], index=True)
+    assert cfg["a.json/why?"] == 3
+    assert cfg["a.json/*"] == 2
+    assert cfg.query("a.json/*") == {"a.json/why?": 3, "a.json/*": 2}
+    with pytest.raises(cfgopt.parser.ConfigParseError):
+        cfgopt.parse_configs(cfg_root='test_uri_index/cfg', args=["--models/*.json/small/epochs=1"])
@@ -0,0 +1,45 @@
+import cfgopt
+import pytest
+
+
+def test_variants():
+    session = cfgopt.ConfigSession("test_variants/cfg", args=["--recipes.json/train/epochs=50"])
+    root = session.root.data
+    arg_lists = [
+        ["--recipes.json/train/optimizer/lr=0.01"],
+        ["--recipes.json/train/optimizer/lr=0.001", "--recipes.json/train/epochs=10"],
+        ["--models.json/model/width=128"],
+        ["--models.json/base/depth=50"],
+        ["--models.json/base/norm/momentum=0.01"],
+    ]
+    variants = session.variants(arg_lists)
+    for args, variant in zip(arg_lists, variants):
+        expected = cfgopt.parse_configs("test_variants/cfg", args=["--recipes.json/train/epochs=50"] + args)
+        assert variant == expected
+
+    # plain updates only copy the containers on their path.
+    lr = variants[0]["recipes.json/train"].data
+    assert lr is not root["recipes.json"]["train"]
+    assert lr["model"] is root["models.json"]["model"]
+    assert variants[0]["models.json"].data is root["models.json"]
+    assert variants[1]["recipes.json/train/epochs"] == 10
+
+    # other updates parse again the addressed files, and the files referencing them.
+    assert variants[2]["models.json/model/head/channels"] == 128
+    assert variants[2]["recipes.json/train/model/width"] == 128
+    assert variants[2]["layers.json"].data is root["layers.json"]
+    assert variants[3]["models.json/model/depth"] == 50
+    # updates through a reference update the referenced node, which stays shared.
+    assert variants[4]["layers.json/bn/momentum"] == 0.01
+    assert variants[4]["models.json/base/norm"].data is variants[4]["layers.json/bn"].data
+
+    # the session tree is left untouched.
+    assert session.root == cfgopt.parse_configs("test_variants/cfg", args=["--recipes.json/train/epochs=50"])
+
+
+def test_variant_errors():
+    session = cfgopt.ConfigSession("test_variants/cfg", args=[])
+    with pytest.raises(cfgopt.parser.ConfigParseError, match="not found"):
+        session.variant(["--recipes.json/train/optimizer/beta=0.9"])
+    with pytest.raises(cfgopt.parser.ConfigParseError, match="Invalid JSON"):
+        session.variant(["--recipes.json/train/optimizer/lr=[0.1"])
@@ -0,0 +1,66 @@
+import copy
+import pickle
+
+import cfgopt
+
+
+def test_wrapped_children():
+    cfg = cfgopt.parse_configs(cfg_root='test_wrapped_children/cfg', args=[])
+    schedule = cfg["train.json/schedule"]
+    assert cfg["train.json/schedule"] is schedule
+    assert cfg["train.json"]["schedule"] is schedule
+    assert cfg["train.json/schedule/warmup"] is schedule["warmup"]
+    assert cfg["train.json/stages"] is cfg["train.json/stages"]
+    assert cfg["train.json/stages/1"] is cfg["train.json/stages"][1]
+    assert dict(cfg["train.json"].items())["schedule"] is schedule
+    assert list(cfg["train.json"].values())[0] is schedule
+    assert not hasattr(schedule, "__dict__")
+
+    # dicts are iterated without copying their keys.
+    keys = iter(schedule)
+    assert next(keys) == "lr"
+    schedule["momentum"] = 0.9
+    try:
+        next(keys)
+        assert False
+    except RuntimeError:
+        pass
+
+
+def test_invalidation():
+    cfg = cfgopt.parse_configs(cfg_root='test_wrapped_children/cfg', args=[])
+    schedule = cfg["train.json/schedule"]
+    milestones = cfg["train.json/schedule/milestones"]
+    warmup = schedule["warmup"]
+
+    cfg["train.json/schedule/warmup"] = {"steps": 1000}
+    assert schedule["warmup"] is not warmup
+    assert schedule["warmup/steps"] == 1000
+    assert cfg["train.json/alias/warmup/steps"] == 1000
+
+    cfg["train.json/schedule/milestones/1"] = 90
+    assert cfg["train.json/schedule/milestones"] == [30, 90]
+    assert milestones == [30, 60]
+
+    # modified in place, or through the raw data.
+    cfg["train.json"].data["stages"][2][0] = 3
+    assert cfg["train.json/stages/2"] == [3, 2]
+    cfg["train.json"].data["stages"][1] = {"depth": 8}
+    assert cfg["train.json/stages/1/depth"] == 8
+    # returned lists modified in place are not returned again.
+    cfg["train.json/schedule/milestones"].append(120)
+    assert cfg["train.json/schedule/milestones"] == [30, 90]
+    cfg["train.json/stages"].pop()
+    assert len(cfg["train.json/stages"]) == 3
+    cfg.data["train.json"] = {"schedule": {"lr": 0.01}}
+    assert cfg["train.json/schedule/lr"] == 0.01
+
+
+def test_copy():
+    cfg = cfgopt.parse_configs(cfg_root='test_wrapped_children/cfg', args=[])
+    schedule = cfg["train.json/schedule"]
+    schedule["warmup"]
+    for copied in (pickle.loads(pickle.dumps(schedule)), copy.deepcopy(schedule), copy.copy(schedule)):
+        assert copied == schedule
+        assert copied["warmup"] is copied["warmup"]
+        assert copied["warmup"] == schedule["warmup"]